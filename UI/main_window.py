@@ -1,8 +1,12 @@
 import ttkbootstrap as ttk
 from tkinter import messagebox
+import profiling
+from events import Event
 from logic import ToDoLogic
+from storage import default_storage
 from UI.task_view import TaskView
 from UI.shop_view import ShopView
+from UI.stats_view import StatsView
 
 
 class MainWindow(ttk.Window):
@@ -14,8 +18,16 @@ class MainWindow(ttk.Window):
         self.title("Codex")
         self.geometry("800x600")
 
-        # main application controller (handles all business stuff)
-        self.controller = ToDoLogic()
+        # opt-in timing of the logic, storage and redraws (CODEX_PROFILE, see profiling.py)
+        self.profiler, self.profile_path = profiling.from_environment()
+
+        # main application controller (handles all business stuff);
+        # changes are saved by a background thread so clicks never wait on the disk
+        storage = default_storage(write_behind=True)
+        if self.profiler:
+            self.controller = profiling.profiled_logic(self.profiler, storage)
+        else:
+            self.controller = ToDoLogic(storage)
 
         # notebook (tab container)
         self.notebook = ttk.Notebook(self)
@@ -24,17 +36,33 @@ class MainWindow(ttk.Window):
         # application views
         self.task_view = TaskView(self.notebook, self.controller)
         self.shop_view = ShopView(self.notebook, self.controller)
+        self.stats_view = StatsView(self.notebook, self.controller)
 
         # add tabs to the notebook
         self.notebook.add(self.task_view, text="Tasks")
         self.notebook.add(self.shop_view, text="Shop")
-        
-        # refresh UI whenever the user changes tabs
-        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        self.notebook.add(self.stats_view, text="Statistics")
+
+        if self.profiler:
+            profiling.instrument_view(self.profiler, self.task_view, "task_list")
+            profiling.instrument_view(self.profiler, self.shop_view, "shop_list")
+            profiling.instrument_view(self.profiler, self.stats_view)
+            # F12 opens the timings collected so far
+            self.bind("<F12>", lambda event: self.show_profile())
+
+        # views subscribe to controller.events and redraw only what changed,
+        # so switching tabs needs no refresh
 
         # initialization logic
         self.check_status_on_startup()
 
+        # one timer for the nearest task deadline, re-armed whenever tasks are added or removed
+        self.deadline_timer = None
+        self.controller.events.subscribe(
+            lambda changes: self.schedule_deadline_timer(), {Event.TASK_ADDED, Event.TASK_REMOVED}
+        )
+        self.on_deadline()
+
         # ensure data is saved when the window is closed
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
 
@@ -43,7 +71,6 @@ class MainWindow(ttk.Window):
         Runs all startup checks in the correct order:
         - Weekly updates (penalties, promotions, reports)
         - Daily status checks
-        - UI refresh
         """
 
         # 1. run weekly logic FIRST to apply penalties and promotions
@@ -54,27 +81,50 @@ class MainWindow(ttk.Window):
         if weekly_message:
             messagebox.showwarning("Weekly Report", weekly_message)
 
-        # 3. run daily logic and display returned messages
+        # 3. run daily logic and display everything it reported in one dialog
         daily_messages = self.controller.check_daily_status()
-        for msg_type, title, message in daily_messages:
-            if msg_type == "info":
-                messagebox.showinfo(title, message)
-            elif msg_type == "warning":
-                messagebox.showwarning(title, message)
+        if daily_messages:
+            report = "\n\n".join(f"{title}: {message}" for _, title, message in daily_messages)
+            if any(msg_type == "warning" for msg_type, _, _ in daily_messages):
+                messagebox.showwarning("Daily Report", report)
+            else:
+                messagebox.showinfo("Daily Report", report)
+
+    def schedule_deadline_timer(self):
+        """Sets a single after() timer for the next deadline; nothing runs while none is due."""
+        if self.deadline_timer is not None:
+            self.after_cancel(self.deadline_timer)
+            self.deadline_timer = None
 
-        # 4. update all UI views with the latest data
-        self.refresh_all_views()
+        deadline = self.controller.next_deadline()
+        if deadline is not None:
+            delay = (deadline - self.controller.clock.now()).total_seconds() * 1000
+            # Tk timers take a 32 bit number of milliseconds (about 24 days)
+            delay = int(min(max(delay, 0), 2**31 - 1))
+            self.deadline_timer = self.after(delay, self.on_deadline)
 
-    def on_tab_changed(self, event):
-        """Called whenever the user switches tabs."""
-        self.refresh_all_views()
+    def on_deadline(self):
+        """Escalates the tasks whose deadline just passed and arms the timer for the next one."""
+        self.deadline_timer = None
+        escalated = self.controller.check_deadlines()
+        self.schedule_deadline_timer()
+        if escalated:
+            names = "\n".join(f"• {task.name}" for task in escalated)
+            messagebox.showwarning("Deadline Passed", f"These tasks are now Urgent:\n\n{names}")
 
-    def refresh_all_views(self):
-        """Refreshes all views to keep the UI in sync with the data."""
-        self.task_view.refresh_ui()
-        self.shop_view.refresh_ui()
+    def show_profile(self):
+        """Debug panel with the timings collected so far."""
+        panel = ttk.Toplevel(self)
+        panel.title("Profile")
+        text = ttk.Text(panel, font=("Courier", 10), wrap="none", width=110, height=30)
+        text.pack(expand=True, fill="both")
+        text.insert("end", self.profiler.report())
+        text.config(state="disabled")
 
     def on_closing(self):
         """Save data and close the application safely."""
         self.controller.save_data()
+        self.controller.storage.close()  # waits for the background saver to finish
+        if self.profiler:
+            self.profiler.dump(self.profile_path)
         self.destroy()
@@ -1,5 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+from events import Event, SHOP_EVENTS
+from UI.virtual_list import VirtualListbox
 
 
 class ShopView(ttk.Frame):
@@ -7,6 +9,7 @@ class ShopView(ttk.Frame):
         # main frame for the shop view
         super().__init__(parent, padding=15)
         self.controller = controller  # Reference to the business logic
+        self.pending_events = set()  # events not drawn yet, see on_changes
 
         # layout configuration
         self.columnconfigure(0, weight=1)
@@ -18,8 +21,9 @@ class ShopView(ttk.Frame):
         self.create_shop_list_widgets()
         self.create_action_widgets()
         
-        # initial UI update
+        # initial UI update, afterwards only what the controller reports as changed
         self.refresh_ui()
+        self.controller.events.subscribe(self.on_changes, SHOP_EVENTS | {Event.WALLET_CHANGED})
 
     def create_header_widgets(self):
         """Creates the shop title and token display."""
@@ -70,16 +74,15 @@ class ShopView(ttk.Frame):
         shop_list_frame.rowconfigure(0, weight=1)
         shop_list_frame.columnconfigure(0, weight=1)
         
-        self.shop_listbox = tk.Listbox(shop_list_frame, height=15)
-        self.shop_listbox.grid(row=0, column=0, sticky="nsew")
-
-        shop_scrollbar = ttk.Scrollbar(
+        # only the visible rows are ever in the listbox (see VirtualListbox)
+        self.shop_list = VirtualListbox(
             shop_list_frame,
-            orient="vertical",
-            command=self.shop_listbox.yview
+            count=lambda: len(self.controller.shop_items),
+            fetch=self.fetch_rows,
+            height=15,
+            selectmode=tk.BROWSE
         )
-        shop_scrollbar.grid(row=0, column=1, sticky="ns")
-        self.shop_listbox.config(yscrollcommand=shop_scrollbar.set)
+        self.shop_list.grid(row=0, column=0, sticky="nsew")
 
     def create_action_widgets(self):
         """Creates action buttons (buy reward)."""
@@ -105,19 +108,18 @@ class ShopView(ttk.Frame):
             # clear inputs and refresh UI on success
             self.reward_entry.delete(0, tk.END)
             self.price_entry.delete(0, tk.END)
-            self.refresh_ui()
         else:
             messagebox.showwarning("Invalid Input", message)
             
     def buy_item(self):
         """Attempts to purchase the selected reward."""
         try:
-            selected_index = self.shop_listbox.curselection()[0]
-            success, message = self.controller.buy_item(selected_index)
+            item_id = self.shop_list.selected_keys()[0]
+            self.shop_list.clear_selection()
+            success, message = self.controller.buy_item(item_id)
 
             if success:
                 messagebox.showinfo("Purchase Successful", message)
-                self.refresh_ui()
             else:
                 messagebox.showerror("Purchase Failed", message)
 
@@ -128,15 +130,31 @@ class ShopView(ttk.Frame):
                 "Please select a reward to purchase."
             )
 
+    def fetch_rows(self, start, count):
+        return [
+            (item.id, f"{item.name} - Price: {item.price} Tokens", None)
+            for item in self.controller.get_shop_items_page(start, count)
+        ]
+
+    def on_changes(self, changes):
+        """Event bus callback; the redraw waits for Tk to be idle so bursts are drawn once."""
+        if not self.pending_events:
+            self.after_idle(self.apply_changes)
+        self.pending_events.update(changes)
+
+    def apply_changes(self):
+        events, self.pending_events = self.pending_events, set()
+        if Event.WALLET_CHANGED in events:
+            self.refresh_tokens()
+        if events & SHOP_EVENTS:
+            self.shop_list.refresh()
+
     def refresh_ui(self):
         """Updates token display and reward list."""
+        self.refresh_tokens()
+        self.shop_list.refresh()
+
+    def refresh_tokens(self):
         self.shop_tokens_label.config(
             text=f"Your Tokens: {self.controller.tokens}"
         )
-
-        self.shop_listbox.delete(0, tk.END)
-        for item in self.controller.shop_items:
-            self.shop_listbox.insert(
-                tk.END,
-                f"{item['name']} - Price: {item['price']} Tokens"
-            )
\ No newline at end of file
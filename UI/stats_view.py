@@ -0,0 +1,94 @@
+from tkinter import ttk
+from events import Event
+from stats import WINDOWS
+
+# (row label, how to show it from a window's sums)
+ROWS = (
+    ("XP earned", lambda sums: f"{sums['xp']}"),
+    ("Tokens earned", lambda sums: f"{sums['tokens']}"),
+    ("Tokens spent", lambda sums: f"{sums['spent']}"),
+    ("Tasks completed", lambda sums: f"{sums['completed']}"),
+    ("Completion rate", lambda sums: (
+        f"{sums['completed'] / sums['added']:.0%}" if sums['added'] else "-"
+    )),
+    ("Mandatory tasks done", lambda sums: f"{sums['mandatory']}"),
+    ("XP lost to inactivity", lambda sums: f"{sums['xp_lost_inactivity']}"),
+    ("XP lost to urgent tasks", lambda sums: f"{sums['xp_lost_urgent']}"),
+)
+
+# how many broken streaks the history lists
+RECENT_STREAKS = 5
+
+
+class StatsView(ttk.Frame):
+    """
+    Statistics tab. Reads the sums ToDoLogic.stats keeps up to date on every
+    change, so drawing it never goes through the history.
+    """
+
+    def __init__(self, parent, controller):
+        super().__init__(parent, padding=15)
+        self.controller = controller
+        self.redraw_pending = False
+
+        self.columnconfigure(0, weight=1)
+        self.create_table_widgets()
+        self.create_streak_widgets()
+        self.refresh_ui()
+
+        self.controller.events.subscribe(self.on_changes, {Event.STATS_CHANGED, Event.STREAK_CHANGED})
+        # the rolling windows move at midnight even when nothing changes
+        self.bind("<Map>", lambda event: self.refresh_ui())
+
+    def create_table_widgets(self):
+        """Creates the metrics table: one row per metric, one column per window."""
+        table_frame = ttk.LabelFrame(self, text="Statistics", padding=10)
+        table_frame.grid(row=0, column=0, sticky="ew", pady=(0, 10))
+
+        headers = [f"Last {days} days" for days in WINDOWS] + ["All time"]
+        for column, header in enumerate(headers, start=1):
+            table_frame.columnconfigure(column, weight=1)
+            ttk.Label(table_frame, text=header, font=("-weight bold")).grid(row=0, column=column, padx=10)
+
+        self.cells = []
+        for row, (label, _) in enumerate(ROWS, start=1):
+            ttk.Label(table_frame, text=label).grid(row=row, column=0, sticky="w", pady=2)
+            cells = []
+            for column in range(1, len(headers) + 1):
+                cell = ttk.Label(table_frame, text="0")
+                cell.grid(row=row, column=column, padx=10)
+                cells.append(cell)
+            self.cells.append(cells)
+
+    def create_streak_widgets(self):
+        """Creates the streak history section."""
+        streak_frame = ttk.LabelFrame(self, text="Streaks", padding=10)
+        streak_frame.grid(row=1, column=0, sticky="ew")
+
+        self.streak_label = ttk.Label(streak_frame, text="", justify="left")
+        self.streak_label.grid(row=0, column=0, sticky="w")
+
+    def on_changes(self, changes):
+        """Event bus callback; redraws once Tk is idle."""
+        if not self.redraw_pending:
+            self.redraw_pending = True
+            self.after_idle(self.refresh_ui)
+
+    def refresh_ui(self):
+        """Fills the table from the materialized sums."""
+        self.redraw_pending = False
+        stats = self.controller.stats
+        windows = [stats.window(days) for days in WINDOWS] + [stats.window()]
+
+        for (_, show), cells in zip(ROWS, self.cells):
+            for cell, sums in zip(cells, windows):
+                cell.config(text=show(sums))
+
+        best = max((length for _, length in stats.streaks), default=0)
+        lines = [
+            f"Current streak: {self.controller.streak_days} days",
+            f"Best streak: {max(best, self.controller.streak_days)} days"
+        ]
+        for day, length in reversed(stats.streaks[-RECENT_STREAKS:]):
+            lines.append(f"  {length} days, ended {day:%Y-%m-%d}")
+        self.streak_label.config(text="\n".join(lines))
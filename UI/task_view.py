@@ -1,7 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+from events import Event, TASK_EVENTS
 from logic import PAUSE_COST
-from datetime import date
+from records import Difficulty, Priority
+from recurrence import DAY_NAMES
+from itertools import islice
+from UI.virtual_list import VirtualListbox
 
 
 class AddMandatoryTaskDialog(tk.Toplevel):
@@ -15,17 +19,6 @@ class AddMandatoryTaskDialog(tk.Toplevel):
         self.parent = parent
         self.result = None
 
-        # maps weekday names to Python's weekday integers
-        self.days_map = {
-            "Monday": 0,
-            "Tuesday": 1,
-            "Wednesday": 2,
-            "Thursday": 3,
-            "Friday": 4,
-            "Saturday": 5,
-            "Sunday": 6
-        }
-
         frame = ttk.Frame(self, padding="10")
         frame.pack(expand=True, fill="both")
 
@@ -33,13 +26,15 @@ class AddMandatoryTaskDialog(tk.Toplevel):
         self.name_entry = ttk.Entry(frame, width=40)
         self.name_entry.grid(row=1, column=0, columnspan=2, sticky="ew", pady=2)
 
-        ttk.Label(frame, text="Activation Day:").grid(row=2, column=0, sticky="w", pady=2)
+        # a weekday from the list, or any rule typed in (see recurrence.py)
+        ttk.Label(frame, text="Repeat (e.g. Monday, mon,thu, every 3 days, monthly 15):").grid(
+            row=2, column=0, sticky="w", pady=2
+        )
         self.day_var = tk.StringVar(value="Monday")
         self.day_menu = ttk.Combobox(
             frame,
             textvariable=self.day_var,
-            values=list(self.days_map.keys()),
-            state="readonly"
+            values=DAY_NAMES + ["Daily"]
         )
         self.day_menu.grid(row=3, column=0, columnspan=2, sticky="ew", pady=2)
 
@@ -67,10 +62,7 @@ class AddMandatoryTaskDialog(tk.Toplevel):
     def add(self):
         """Validates input and sends the new mandatory task to the controller."""
         name = self.name_entry.get()
-        day_str = self.day_var.get()
-        day_int = self.days_map[day_str]
-
-        success, message = self.controller.add_mandatory_task(name, day_int)
+        success, message = self.controller.add_mandatory_task(name, self.day_var.get())
         if success:
             self.destroy()
         else:
@@ -84,8 +76,8 @@ class TaskView(ttk.Frame):
         super().__init__(parent, padding=15)
         self.controller = controller
 
-        # unified list maps visible items to their real indices
-        self.unified_task_list = []
+        # events received since the last redraw, applied together when Tk is idle
+        self.pending_events = set()
 
         self.columnconfigure(0, weight=1)
         self.rowconfigure(2, weight=1)
@@ -96,6 +88,10 @@ class TaskView(ttk.Frame):
         self.create_action_widgets()
         self.refresh_ui()
 
+        self.controller.events.subscribe(
+            self.on_changes, TASK_EVENTS | {Event.WALLET_CHANGED, Event.LEVEL_CHANGED, Event.STREAK_CHANGED}
+        )
+
     def create_status_widgets(self):
         """Creates the status bar (tokens, level, XP, streak)."""
         stats_frame = ttk.LabelFrame(self, text="Status", padding=10)
@@ -132,7 +128,7 @@ class TaskView(ttk.Frame):
         self.difficulty_menu = ttk.Combobox(
             input_frame,
             textvariable=self.difficulty_var,
-            values=["Very Easy", "Easy", "Medium", "Hard", "Very Hard"],
+            values=Difficulty.labels(),
             state="readonly",
             width=12
         )
@@ -143,18 +139,23 @@ class TaskView(ttk.Frame):
         self.priority_menu = ttk.Combobox(
             input_frame,
             textvariable=self.priority_var,
-            values=["Irrelevant", "Low", "Medium", "High", "Urgent"],
+            values=Priority.labels(),
             state="readonly",
             width=10
         )
         self.priority_menu.grid(row=0, column=5, padx=(0, 10))
 
+        # optional deadline, YYYY-MM-DD or YYYY-MM-DD HH:MM
+        ttk.Label(input_frame, text="Due:").grid(row=0, column=6, padx=(0, 5))
+        self.due_entry = ttk.Entry(input_frame, width=16)
+        self.due_entry.grid(row=0, column=7, padx=(0, 10))
+
         ttk.Button(
             input_frame,
             text="Add",
             command=self.add_task,
             style="success.TButton"
-        ).grid(row=0, column=6)
+        ).grid(row=0, column=8)
 
     def create_list_widgets(self):
         """Creates the task listbox."""
@@ -163,17 +164,18 @@ class TaskView(ttk.Frame):
         list_frame.rowconfigure(0, weight=1)
         list_frame.columnconfigure(0, weight=1)
 
-        self.task_listbox = tk.Listbox(
+        # only the visible rows are ever in the listbox (see VirtualListbox);
+        # extended selection (shift/ctrl-click) so several tasks can be completed at once
+        self.task_list = VirtualListbox(
             list_frame,
+            count=self.count_rows,
+            fetch=self.fetch_rows,
             height=15,
+            selectmode=tk.EXTENDED,
             selectbackground="#007bff",
             selectforeground="white"
         )
-        self.task_listbox.grid(row=0, column=0, sticky="nsew")
-
-        scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.task_listbox.yview)
-        scrollbar.grid(row=0, column=1, sticky="ns")
-        self.task_listbox.config(yscrollcommand=scrollbar.set)
+        self.task_list.grid(row=0, column=0, sticky="nsew")
 
     def create_action_widgets(self):
         """Creates action buttons for tasks."""
@@ -214,55 +216,57 @@ class TaskView(ttk.Frame):
         success, message = self.controller.add_task(
             self.task_entry.get(),
             self.difficulty_var.get(),
-            self.priority_var.get()
+            self.priority_var.get(),
+            self.due_entry.get()
         )
 
         if success:
             self.task_entry.delete(0, tk.END)
-            self.refresh_ui()
+            self.due_entry.delete(0, tk.END)
         else:
             messagebox.showwarning("Invalid Input", message)
 
     def add_mandatory_task(self):
         """Opens the mandatory task dialog."""
         AddMandatoryTaskDialog(self, self.controller)
-        self.refresh_ui()
+
+    def selected_ids(self):
+        """Returns the ids of the selected rows."""
+        task_ids = self.task_list.selected_keys()
+        self.task_list.clear_selection()
+        return task_ids
 
     def delete_task(self):
-        """Deletes the selected task (regular or mandatory)."""
-        try:
-            selected_index = self.task_listbox.curselection()[0]
-            task_info = self.unified_task_list[selected_index]
+        """Deletes the selected tasks (regular or mandatory)."""
+        task_ids = self.selected_ids()
+        if not task_ids:
+            messagebox.showwarning("No Selection", "Please select a task to delete.")
+            return
 
-            if task_info['type'] == 'regular':
-                self.controller.delete_task(task_info['original_index'])
+        for task_id in task_ids:
+            if task_id in self.controller.tasks:
+                self.controller.delete_task(task_id)
             else:
-                self.controller.delete_mandatory_task(task_info['original_index'])
+                self.controller.delete_mandatory_task(task_id)
 
-            self.refresh_ui()
+    def complete_task(self):
+        """Completes the selected tasks; regular ones are completed as one batch."""
+        task_ids = self.selected_ids()
+        if not task_ids:
+            messagebox.showwarning("No Selection", "Please select a task to complete.")
+            return
 
-        except IndexError:
-            messagebox.showwarning("No Selection", "Please select a task to delete.")
+        regular_ids = [task_id for task_id in task_ids if task_id in self.controller.tasks]
+        mandatory_ids = [task_id for task_id in task_ids if task_id not in self.controller.tasks]
 
-    def complete_task(self):
-        """Completes the selected task."""
-        try:
-            selected_index = self.task_listbox.curselection()[0]
-            task_info = self.unified_task_list[selected_index]
-
-            if task_info['type'] == 'regular':
-                result_message = self.controller.complete_task(task_info['original_index'])
-                title = "Task Completed!"
-            else:
-                result_message = self.controller.complete_mandatory_task(task_info['original_index'])
-                title = "Mandatory Task"
+        if regular_ids:
+            _, result_message = self.controller.complete_tasks(regular_ids)
+            messagebox.showinfo("Task Completed!", result_message)
 
+        for task_id in mandatory_ids:
+            result_message = self.controller.complete_mandatory_task(task_id)
             if result_message:
-                messagebox.showinfo(title, result_message)
-                self.refresh_ui()
-
-        except IndexError:
-            messagebox.showwarning("No Selection", "Please select a task to complete.")
+                messagebox.showinfo("Mandatory Task", result_message)
 
     def pause_day(self):
         """Pauses the current day by spending tokens."""
@@ -274,31 +278,24 @@ class TaskView(ttk.Frame):
 
             if success:
                 messagebox.showinfo("Day Paused", message)
-                self.refresh_ui()
             else:
                 messagebox.showerror("Insufficient Tokens", message)
 
-    def refresh_ui(self):
-        """Refreshes the task list and all status indicators."""
-        self.task_listbox.delete(0, tk.END)
-        self.unified_task_list = []
+    def count_rows(self):
+        return len(self.controller.mandatory_tasks) + self.controller.count_tasks()
 
-        today_weekday = date.today().weekday()
-        days_list = [
-            "Monday", "Tuesday", "Wednesday",
-            "Thursday", "Friday", "Saturday", "Sunday"
-        ]
+    def fetch_rows(self, start, count):
+        """Rows `start`..`start + count` of the list: mandatory tasks first, then regular ones."""
+        rows = []
+        today = self.controller.clock.today()
 
         # 1. mandatory tasks (with color-coded states wow so fancy)
-        for i, task in enumerate(self.controller.mandatory_tasks):
-            self.unified_task_list.append({"type": "mandatory", "original_index": i})
+        mandatory_tasks = self.controller.mandatory_tasks
+        for task in islice(mandatory_tasks.values(), start, start + count):
+            display_text = f"◆ {task.name} (Mandatory - {task.rule.describe()})"
 
-            day_name = days_list[task['activation_day']]
-            display_text = f"◆ {task['name']} (Mandatory - {day_name})"
-            self.task_listbox.insert(tk.END, display_text)
-
-            is_active_today = today_weekday == task['activation_day']
-            is_completed_today = task.get('completed_today', False)
+            is_active_today = mandatory_tasks.is_due(task, today)
+            is_completed_today = task.completed_on == today
 
             if is_completed_today:
                 color = "#242446"   # dark blue: completed
@@ -307,19 +304,50 @@ class TaskView(ttk.Frame):
             else:
                 color = "grey"      # inactive
 
-            self.task_listbox.itemconfig(tk.END, {'fg': color})
+            rows.append((task.id, display_text, color))
 
         # 2. regular tasks
-        for i, task in enumerate(self.controller.tasks):
-            self.unified_task_list.append({"type": "regular", "original_index": i})
+        regular_start = max(0, start - len(mandatory_tasks))
+        for task in self.controller.get_tasks_page(regular_start, count - len(rows)):
             display_text = (
-                f"| {task['name']} | Difficulty: {task['difficulty']} "
-                f"| Priority: {task['priority']} |"
+                f"| {task.name} | Difficulty: {task.difficulty.label} "
+                f"| Priority: {task.priority.label} |"
             )
-            self.task_listbox.insert(tk.END, display_text)
+            if task.due:
+                display_text += f" Due: {task.due:%Y-%m-%d %H:%M} |"
+            rows.append((task.id, display_text, None))
+
+        return rows
+
+    def on_changes(self, changes):
+        """Event bus callback; redraws once Tk is idle so a burst of changes costs one redraw."""
+        if not self.pending_events:
+            self.after_idle(self.apply_changes)
+        self.pending_events.update(changes)
+
+    def apply_changes(self):
+        """Redraws only the widgets affected by the pending events."""
+        events, self.pending_events = self.pending_events, set()
+        if events & TASK_EVENTS:
+            self.task_list.refresh()
+        if Event.WALLET_CHANGED in events:
+            self.refresh_tokens()
+        if Event.LEVEL_CHANGED in events:
+            self.refresh_level()
+        if Event.STREAK_CHANGED in events:
+            self.refresh_streak()
+
+    def refresh_ui(self):
+        """Redraws the task list and all status indicators."""
+        self.task_list.refresh()
+        self.refresh_tokens()
+        self.refresh_level()
+        self.refresh_streak()
 
-        # 3. status updates
+    def refresh_tokens(self):
         self.tokens_label.config(text=f"Tokens: {self.controller.tokens}")
+
+    def refresh_level(self):
         self.level_label.config(text=f"Level: {self.controller.level}")
         self.xp_label.config(
             text=f"XP: {self.controller.xp}/{self.controller.xp_to_next_level}"
@@ -330,11 +358,8 @@ class TaskView(ttk.Frame):
             if self.controller.xp_to_next_level > 0 else 0
         )
 
+    def refresh_streak(self):
         self.streak_label.config(
             text=f"Multiplier: x{self.controller.streak_multiplier:.1f} "
                  f"({self.controller.streak_days} days)"
         )
-
-        self.pause_btn.config(text=f"Pause Day ({PAUSE_COST} Tokens)")
-
-# this code fucking sucks
@@ -0,0 +1,118 @@
+import tkinter as tk
+from difflib import SequenceMatcher
+from tkinter import ttk, font as tkfont
+
+
+class VirtualListbox(ttk.Frame):
+    """
+    Listbox that only holds the rows currently scrolled into view.
+
+    Rows come from two callbacks: count() -> total number of rows and
+    fetch(start, count) -> list of (key, text, color) tuples, color may be None.
+    refresh() compares the visible window with what is already shown and only
+    touches the rows that changed, so a list of 50k entries costs the same
+    to redraw as one screenful. Selection is tracked by key, so it survives
+    scrolling and re-sorting.
+    """
+
+    def __init__(self, parent, count, fetch, **listbox_options):
+        super().__init__(parent)
+        self.count = count
+        self.fetch = fetch
+        self.start = 0          # logical index of the first visible row
+        self.shown = []         # (key, text, color) rows currently in the listbox
+        self.selected = set()   # keys of selected rows, visible or not
+
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self.listbox = tk.Listbox(self, exportselection=False, **listbox_options)
+        self.listbox.grid(row=0, column=0, sticky="nsew")
+
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.on_scroll)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+
+        self.visible_rows = int(self.listbox.cget("height"))
+        self.listbox.bind("<Configure>", self.on_resize)
+        self.listbox.bind("<<ListboxSelect>>", self.on_select)
+        self.listbox.bind("<MouseWheel>", self.on_mousewheel)
+        self.listbox.bind("<Button-4>", lambda event: self.scroll_by(-3))
+        self.listbox.bind("<Button-5>", lambda event: self.scroll_by(3))
+
+    # --- scrolling ---
+    def on_resize(self, event):
+        """Works out how many rows fit in the listbox's new height."""
+        line_height = tkfont.Font(font=self.listbox.cget("font")).metrics("linespace")
+        line_height += 2 * int(self.listbox.cget("selectborderwidth"))
+        border = 2 * (int(self.listbox.cget("borderwidth")) + int(self.listbox.cget("highlightthickness")))
+        visible_rows = max(1, (event.height - border) // line_height)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.refresh()
+
+    def on_mousewheel(self, event):
+        self.scroll_by(-1 if event.delta > 0 else 1)
+        return "break"
+
+    def on_scroll(self, action, amount, unit=None):
+        """Scrollbar callback ("moveto", fraction) or ("scroll", n, "units"/"pages")."""
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * self.count()))
+        elif unit == "pages":
+            self.scroll_by(int(amount) * self.visible_rows)
+        else:
+            self.scroll_by(int(amount))
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.start + rows)
+
+    def scroll_to(self, start):
+        self.start = start
+        self.refresh()
+
+    # --- selection ---
+    def on_select(self, event=None):
+        if self.listbox.cget("selectmode") in (tk.BROWSE, tk.SINGLE):
+            self.selected.clear()  # one selection at most, even if it scrolled away
+        for row, (key, _, _) in enumerate(self.shown):
+            if self.listbox.selection_includes(row):
+                self.selected.add(key)
+            else:
+                self.selected.discard(key)
+
+    def selected_keys(self):
+        return list(self.selected)
+
+    def clear_selection(self):
+        self.selected.clear()
+        self.listbox.selection_clear(0, tk.END)
+
+    # --- rendering ---
+    def refresh(self):
+        """Re-renders the visible window, touching only rows that changed."""
+        total = self.count()
+        self.start = max(0, min(self.start, total - self.visible_rows))
+        rows = self.fetch(self.start, self.visible_rows)
+
+        # applied back to front so earlier listbox indexes stay valid
+        matcher = SequenceMatcher(None, self.shown, rows, autojunk=False)
+        for tag, old_start, old_end, new_start, new_end in reversed(matcher.get_opcodes()):
+            if tag == "equal":
+                continue
+            if old_end > old_start:
+                self.listbox.delete(old_start, old_end - 1)
+            for offset, (_, text, color) in enumerate(rows[new_start:new_end]):
+                self.listbox.insert(old_start + offset, text)
+                if color is not None:
+                    self.listbox.itemconfig(old_start + offset, {'fg': color})
+        self.shown = rows
+
+        self.listbox.selection_clear(0, tk.END)
+        for row, (key, _, _) in enumerate(rows):
+            if key in self.selected:
+                self.listbox.selection_set(row)
+
+        if total:
+            self.scrollbar.set(self.start / total, min(1.0, (self.start + len(rows)) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
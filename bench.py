@@ -0,0 +1,276 @@
+"""
+Benchmarks for the ToDoLogic hot paths on synthetic profiles of 10^3 to 10^6
+tasks (plus a tenth as many shop items and a hundredth as many mandatory
+tasks), on each storage backend. Results go to a JSON report that a later
+run can be compared against:
+
+    python bench.py --sizes 1000 100000 --output before.json
+    python bench.py --sizes 1000 100000 --compare before.json
+
+Times are seconds per operation: the best and the median of --repeat runs.
+With --compare, anything whose median got slower than --threshold times the
+old one is listed and the exit code is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import recurrence
+from clock import SimulatedClock
+from logic import ToDoLogic
+from records import Difficulty, Priority
+from storage import JournalStorage, MemoryStorage, SqliteStorage
+
+START = date(2025, 1, 6)
+
+# operations timed per run, for the benchmarks that repeat a cheap call
+OPS = 200
+
+BACKENDS = {
+    "memory": lambda folder: MemoryStorage(),
+    "json": lambda folder: JournalStorage(os.path.join(folder, "data.json")),
+    "sqlite": lambda folder: SqliteStorage(os.path.join(folder, "data.db")),
+}
+
+
+def make_profile(size, seed=0):
+    """Snapshot dict (as ToDoLogic._snapshot() writes it) with `size` tasks."""
+    rng = random.Random(seed)
+    clock = SimulatedClock(START)
+    state = ToDoLogic(MemoryStorage(), clock)._state()
+    rules = [
+        recurrence.Weekdays((0,)), recurrence.Weekdays((0, 2, 4)), recurrence.parse("daily", START),
+        recurrence.EveryNDays(3, START), recurrence.MonthlyOn(15),
+    ]
+
+    next_id = 1
+    tasks = []
+    for _ in range(size):
+        due = START + timedelta(days=rng.randrange(1, 365)) if rng.random() < 0.2 else None
+        tasks.append({
+            "id": next_id,
+            "name": f"Task {next_id}",
+            "difficulty": rng.choice(list(Difficulty)).label,
+            "priority": rng.choice(list(Priority)).label,
+            "due": f"{due.isoformat()}T23:59" if due else None,
+        })
+        next_id += 1
+    shop_items = []
+    for _ in range(max(1, size // 10)):
+        shop_items.append({"id": next_id, "name": f"Reward {next_id}", "price": rng.randrange(10, 5000)})
+        next_id += 1
+    mandatory_tasks = []
+    for _ in range(max(1, size // 100)):
+        rule = rng.choice(rules)
+        item = {"id": next_id, "name": f"Routine {next_id}", "rule": rule.to_dict(), "completed_on": None}
+        if isinstance(rule, recurrence.Weekdays) and len(rule.days) == 1:
+            item["activation_day"] = rule.days[0]
+        mandatory_tasks.append(item)
+        next_id += 1
+
+    return {
+        **state,
+        "next_id": next_id,
+        "stats": {},
+        "tasks": tasks,
+        "shop_items": shop_items,
+        "mandatory_tasks": mandatory_tasks,
+    }
+
+
+# --- benchmarks ---
+# each takes (logic, clock, storage factory) and returns (operations, callable);
+# only the callable is timed, so setup that keeps the profile's size steady stays out
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(function):
+        BENCHMARKS[name] = function
+        return function
+    return register
+
+
+@benchmark("add_task")
+def bench_add_task(logic, clock, reopen):
+    def run():
+        for index in range(OPS):
+            logic.add_task("Benchmark task", index % 5, index % 5)
+    return OPS, run
+
+
+@benchmark("complete_task")
+def bench_complete_task(logic, clock, reopen):
+    first = logic.next_id
+    for index in range(OPS):
+        logic.add_task("Benchmark task", index % 5, index % 5)
+    ids = range(first, logic.next_id)
+
+    def run():
+        for task_id in ids:
+            logic.complete_task(task_id)
+    return OPS, run
+
+
+@benchmark("complete_tasks_batch")
+def bench_complete_tasks(logic, clock, reopen):
+    first = logic.next_id
+    for index in range(OPS):
+        logic.add_task("Benchmark task", index % 5, index % 5)
+    ids = list(range(first, logic.next_id))
+    return OPS, lambda: logic.complete_tasks(ids)
+
+
+@benchmark("tasks_in_order")
+def bench_tasks_in_order(logic, clock, reopen):
+    # what the old _sort_tasks() was for: the list in display order
+    return 1, lambda: list(logic.tasks.values())
+
+
+@benchmark("sort_shop_items")
+def bench_sort_shop_items(logic, clock, reopen):
+    return 1, logic._sort_shop_items
+
+
+@benchmark("increase_task_priorities")
+def bench_increase_task_priorities(logic, clock, reopen):
+    return 1, logic._increase_task_priorities
+
+
+@benchmark("check_daily_status_10y_gap")
+def bench_check_daily_status(logic, clock, reopen):
+    clock.advance(days=3650)
+    return 1, logic.check_daily_status
+
+
+@benchmark("check_level_up_huge_xp")
+def bench_check_level_up(logic, clock, reopen):
+    logic.xp = 10 ** 15
+    return 1, logic.check_level_up
+
+
+@benchmark("save_data")
+def bench_save_data(logic, clock, reopen):
+    def run():
+        for _ in range(OPS):
+            logic.save_data()
+    return OPS, run
+
+
+@benchmark("compact")
+def bench_compact(logic, clock, reopen):
+    return 1, logic.compact
+
+
+@benchmark("load_data")
+def bench_load_data(logic, clock, reopen):
+    logic.compact()
+    return 1, lambda: ToDoLogic(reopen(), clock)
+
+
+def run_benchmarks(sizes, backends, names, repeat=5, seed=0, log=None):
+    """{"<backend>/<size>/<benchmark>": {"ops", "best", "median"}}, times in seconds per operation."""
+    results = {}
+    for size in sizes:
+        profile = make_profile(size, seed)
+        for backend in backends:
+            with tempfile.TemporaryDirectory() as folder:
+                storage = BACKENDS[backend](folder)
+                if backend == "memory":
+                    storage = MemoryStorage(profile)
+                else:
+                    storage.write_snapshot(profile)
+                clock = SimulatedClock(START)
+                logic = ToDoLogic(storage, clock)
+                # reopening a MemoryStorage would reload nothing, so it gets the snapshot back
+                reopen = (lambda: MemoryStorage(logic._snapshot())) if backend == "memory" \
+                    else (lambda: BACKENDS[backend](folder))
+
+                for name in names:
+                    times = []
+                    for _ in range(repeat):
+                        ops, run = BENCHMARKS[name](logic, clock, reopen)
+                        started = time.perf_counter()
+                        run()
+                        times.append((time.perf_counter() - started) / ops)
+                    key = f"{backend}/{size}/{name}"
+                    results[key] = {"ops": ops, "best": min(times), "median": statistics.median(times)}
+                    if log:
+                        log(f"{key:<50} {format_seconds(results[key]['median']):>10}")
+                logic.storage.close()
+    return results
+
+
+def format_seconds(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def compare(results, baseline, threshold):
+    """Lines describing each benchmark in both reports, and the keys that regressed."""
+    lines, regressions = [], []
+    for key, result in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        ratio = result["median"] / old["median"] if old["median"] else float("inf")
+        flag = ""
+        if ratio > threshold:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        lines.append(
+            f"{key:<50} {format_seconds(old['median']):>10} -> {format_seconds(result['median']):>10}"
+            f"  x{ratio:.2f}{flag}"
+        )
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ToDoLogic hot paths.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS))
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="JSON report of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown that counts as a regression")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.backends, args.only, args.repeat, args.seed, log=print)
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        lines, regressions = compare(results, baseline, args.threshold)
+        print("\n".join(["", f"Compared with {args.compare}:"] + lines))
+        if regressions:
+            print(f"{len(regressions)} regression(s) over x{args.threshold}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+"""
+Command line front end for ToDoLogic. Never imports tkinter, so it starts fast
+and works on machines without a display (cron jobs, scripts, ssh).
+
+    python main.py add "Write report" --difficulty Hard --priority High
+    python main.py list
+    python main.py complete 12
+    python main.py daily-check
+"""
+import argparse
+import os
+import sys
+from datetime import timedelta
+
+import profiling
+import transfer
+from logic import ToDoLogic, PAUSE_COST, TASKS_FOR_STREAK
+from profiles import ProfileManager
+from records import Difficulty, Priority
+from recurrence import DAY_NAMES
+
+
+def cmd_add(logic, args):
+    return logic.add_task(args.name, args.difficulty, args.priority, args.due)
+
+
+def cmd_add_mandatory(logic, args):
+    return logic.add_mandatory_task(args.name, args.repeat or DAY_NAMES.index(args.day))
+
+
+def cmd_complete(logic, args):
+    regular_ids = [task_id for task_id in args.ids if task_id in logic.tasks]
+    messages = []
+    if regular_ids:
+        messages.append(logic.complete_tasks(regular_ids)[1])
+    for task_id in args.ids:
+        if task_id in logic.mandatory_tasks:
+            messages.append(logic.complete_mandatory_task(task_id))
+    if not messages:
+        return False, "Task not found."
+    return True, "\n".join(messages)
+
+
+def cmd_delete(logic, args):
+    if args.id in logic.mandatory_tasks:
+        return logic.delete_mandatory_task(args.id)
+    return logic.delete_task(args.id)
+
+
+def cmd_list(logic, args):
+    lines = []
+    today = logic.clock.today()
+    for task in logic.mandatory_tasks.values():
+        done = " (done)" if task.completed_on == today else ""
+        lines.append(f"{task.id:>6}  ◆ {task.name} (Mandatory - {task.rule.describe()}){done}")
+    for task in logic.get_tasks_page(args.offset, args.limit):
+        due = f" | due {task.due:%Y-%m-%d %H:%M}" if task.due else ""
+        lines.append(f"{task.id:>6}  {task.name} | {task.difficulty.label} | {task.priority.label}{due}")
+    return True, "\n".join(lines) or "No tasks."
+
+
+def cmd_shop(logic, args):
+    lines = [
+        f"{item.id:>6}  {item.name} - {item.price} Tokens"
+        for item in logic.get_shop_items_page(args.offset, args.limit)
+    ]
+    return True, "\n".join(lines) or "The shop is empty."
+
+
+def cmd_add_reward(logic, args):
+    return logic.add_shop_item(args.name, args.price)
+
+
+def cmd_buy(logic, args):
+    return logic.buy_item(args.id)
+
+
+def cmd_pause(logic, args):
+    return logic.pause_day()
+
+
+def cmd_status(logic, args):
+    return True, (
+        f"Level {logic.level} | XP {logic.xp}/{logic.xp_to_next_level} | "
+        f"Tokens {logic.tokens} | Multiplier x{logic.streak_multiplier:.1f} ({logic.streak_days} days)"
+    )
+
+
+def cmd_stats(logic, args):
+    history = logic.history
+    completed, xp, tokens = history.totals()
+    streak, streak_start = history.longest_streak(TASKS_FOR_STREAK)
+    week_start = logic.clock.today() - timedelta(days=6)
+    lines = [
+        f"Completed {completed} tasks for {xp} XP and {tokens} Tokens",
+        "By difficulty: " + ", ".join(
+            f"{difficulty.label} {count}" for difficulty, count in history.by_difficulty().items()
+        ),
+        f"Longest streak: {streak} days" + (f" (from {streak_start:%Y-%m-%d})" if streak else ""),
+        "Last 7 days: " + (", ".join(
+            f"{day:%a} {day_xp} XP" for day, day_xp in history.per_day("xp", week_start).items()
+        ) or "nothing completed")
+    ]
+    return True, "\n".join(lines)
+
+
+def cmd_daily_check(logic, args):
+    """Same startup checks as the GUI: weekly updates first, then the daily ones and deadlines."""
+    logic.check_weekly_updates()
+    lines = []
+    weekly_message = logic.get_and_clear_pending_message()
+    if weekly_message:
+        lines.append(weekly_message)
+    for _, title, message in logic.check_daily_status():
+        lines.append(f"{title}: {message}")
+    for task in logic.check_deadlines():
+        lines.append(f"Deadline passed: {task.name} is now Urgent.")
+    return True, "\n".join(lines) or "Nothing to report."
+
+
+def cmd_import(logic, args):
+    try:
+        result = transfer.import_file(logic, args.kind, args.path, args.strict)
+    except (OSError, ValueError) as e:
+        return False, str(e)
+    message = result.describe(args.kind)
+    if args.strict and result.rejected:
+        message += "\nNothing was imported (--strict)."
+    return not result.rejected, message
+
+
+def cmd_export(logic, args):
+    try:
+        count = transfer.export_file(logic, args.kind, args.path)
+    except (OSError, ValueError) as e:
+        return False, str(e)
+    return True, f"Exported {count} {args.kind.replace('_', ' ')} to {args.path}."
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="codex", description="Gamified task manager.")
+    parser.add_argument(
+        "--user", metavar="NAME",
+        help="use this profile's data, kept in CODEX_PROFILES (default: profiles/) instead of data.json"
+    )
+    parser.add_argument(
+        "--profile", metavar="PATH",
+        help="time the command and print where it went; saves histograms (.json) or cProfile stats to PATH"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="add a regular task")
+    add.add_argument("name")
+    add.add_argument("--difficulty", choices=Difficulty.labels(), default="Easy")
+    add.add_argument("--priority", choices=Priority.labels(), default="Low")
+    add.add_argument("--due", help="deadline, YYYY-MM-DD or YYYY-MM-DD HH:MM")
+    add.set_defaults(func=cmd_add)
+
+    add_mandatory = commands.add_parser("add-mandatory", help="add a mandatory (recurring) task")
+    add_mandatory.add_argument("name")
+    when = add_mandatory.add_mutually_exclusive_group(required=True)
+    when.add_argument("--day", choices=DAY_NAMES)
+    when.add_argument("--repeat", help='e.g. "mon,wed,fri", "daily", "every 3 days", "monthly 15"')
+    add_mandatory.set_defaults(func=cmd_add_mandatory)
+
+    complete = commands.add_parser("complete", help="complete one or more tasks by id")
+    complete.add_argument("ids", type=int, nargs="+")
+    complete.set_defaults(func=cmd_complete)
+
+    for name, func, help_text in (
+        ("delete", cmd_delete, "delete a task by id"),
+        ("buy", cmd_buy, "buy a reward by id"),
+    ):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("id", type=int)
+        command.set_defaults(func=func)
+
+    for name, func, help_text in (("list", cmd_list, "list tasks"), ("shop", cmd_shop, "list rewards")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("--offset", type=int, default=0)
+        command.add_argument("--limit", type=int, default=50)
+        command.set_defaults(func=func)
+
+    add_reward = commands.add_parser("add-reward", help="add a reward to the shop")
+    add_reward.add_argument("name")
+    add_reward.add_argument("price")
+    add_reward.set_defaults(func=cmd_add_reward)
+
+    commands.add_parser("pause", help=f"pause today for {PAUSE_COST} Tokens").set_defaults(func=cmd_pause)
+    commands.add_parser("status", help="show level, XP, tokens and streak").set_defaults(func=cmd_status)
+    commands.add_parser("stats", help="show statistics from the completion history").set_defaults(func=cmd_stats)
+    commands.add_parser(
+        "daily-check", help="apply daily and weekly penalties/resets"
+    ).set_defaults(func=cmd_daily_check)
+
+    import_command = commands.add_parser("import", help="import tasks or rewards from a .csv/.jsonl file")
+    import_command.add_argument("kind", choices=list(transfer.COLUMNS))
+    import_command.add_argument("path")
+    import_command.add_argument("--strict", action="store_true", help="import nothing if any row is invalid")
+    import_command.set_defaults(func=cmd_import)
+
+    export_command = commands.add_parser("export", help="export tasks or rewards to a .csv/.jsonl file")
+    export_command.add_argument("kind", choices=list(transfer.COLUMNS))
+    export_command.add_argument("path")
+    export_command.set_defaults(func=cmd_export)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    profiler, profile_path = profiling.from_environment()
+    if args.profile:
+        profiler, profile_path = profiling.Profiler(cprofile=not args.profile.endswith(".json")), args.profile
+
+    load = (lambda storage=None, clock=None: profiling.profiled_logic(profiler, storage, clock)) \
+        if profiler else ToDoLogic
+    profiles = None
+    if args.user:
+        # through the manager, so the leaderboards see the change too
+        profiles = ProfileManager(os.environ.get("CODEX_PROFILES", "profiles"), capacity=1, factory=load)
+        try:
+            logic = profiles.get(args.user)
+        except ValueError as e:
+            print(e)
+            return 1
+    else:
+        logic = load()
+    try:
+        success, message = args.func(logic, args)
+    finally:
+        if profiles:
+            profiles.close()
+        else:
+            logic.storage.close()
+    print(message)
+
+    if profiler:
+        profiler.dump(profile_path)
+        print(profiler.report(), file=sys.stderr)
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+"""
+Where ToDoLogic gets the current date and time from. The real clock is the
+default; SimulatedClock lets tests and the simulation driver (simulate.py)
+fast-forward through days without waiting for them.
+"""
+from datetime import date, datetime, time, timedelta
+
+
+class SystemClock:
+    def today(self):
+        return date.today()
+
+    def now(self):
+        return datetime.now()
+
+
+class SimulatedClock:
+    """A clock that only moves when told to."""
+
+    def __init__(self, start=None):
+        self.current = start if isinstance(start, datetime) else datetime.combine(start or date.today(), time(12))
+
+    def today(self):
+        return self.current.date()
+
+    def now(self):
+        return self.current
+
+    def advance(self, days=0, **delta):
+        """Moves forward by the given timedelta arguments (days, hours, minutes...)."""
+        self.current += timedelta(days=days, **delta)
+
+    def set(self, moment):
+        self.current = moment if isinstance(moment, datetime) else datetime.combine(moment, self.current.time())
@@ -0,0 +1,68 @@
+from contextlib import contextmanager
+from enum import Enum
+
+
+class Event(Enum):
+    TASK_ADDED = "task_added"              # regular or mandatory task
+    TASK_REMOVED = "task_removed"
+    TASK_UPDATED = "task_updated"
+    SHOP_ITEM_ADDED = "shop_item_added"
+    SHOP_ITEM_REMOVED = "shop_item_removed"
+    WALLET_CHANGED = "wallet_changed"      # tokens
+    LEVEL_CHANGED = "level_changed"        # level, xp or xp_to_next_level
+    STREAK_CHANGED = "streak_changed"      # streak_days or streak_multiplier
+    STATS_CHANGED = "stats_changed"        # anything in ToDoLogic.stats
+
+
+TASK_EVENTS = {Event.TASK_ADDED, Event.TASK_REMOVED, Event.TASK_UPDATED}
+SHOP_EVENTS = {Event.SHOP_ITEM_ADDED, Event.SHOP_ITEM_REMOVED}
+
+
+class EventBus:
+    """
+    Collects change events from ToDoLogic and hands them to subscribers in
+    coalesced batches: callback(changes) where changes maps each Event that
+    happened to the set of record ids it touched (None when it touched all of them).
+    """
+
+    def __init__(self):
+        self.subscribers = []
+        self.pending = {}
+        self._held = 0
+
+    def subscribe(self, callback, events=None):
+        """Registers callback for the given events (all of them by default)."""
+        self.subscribers.append((callback, set(events) if events else None))
+
+    def unsubscribe(self, callback):
+        self.subscribers = [entry for entry in self.subscribers if entry[0] != callback]
+
+    def emit(self, event, ids=None):
+        if event in self.pending:
+            if self.pending[event] is None or ids is None:
+                self.pending[event] = None
+            else:
+                self.pending[event] |= set(ids)
+        else:
+            self.pending[event] = None if ids is None else set(ids)
+
+    @contextmanager
+    def batch(self):
+        """Delivers everything emitted inside the block as one notification."""
+        self._held += 1
+        try:
+            yield
+        finally:
+            self._held -= 1
+            self.flush()
+
+    def flush(self):
+        if self._held or not self.pending:
+            return
+        changes, self.pending = self.pending, {}
+        for callback, events in self.subscribers:
+            wanted = changes if events is None else {
+                event: ids for event, ids in changes.items() if event in events
+            }
+            if wanted:
+                callback(wanted)
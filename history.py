@@ -0,0 +1,216 @@
+"""
+Append-only history of completed tasks, kept column by column in compact
+typed arrays (about 18 bytes per completion) instead of a list of dicts.
+
+On disk it is a sequence of binary chunks, one per completion batch:
+
+    b"CXH1" | row count (uint32) | time column | xp | tokens | difficulty | priority
+
+each column being the raw little-endian bytes of its array. Loading is a
+handful of frombytes() calls per chunk, and the statistics queries run as
+vectorized NumPy scans over the columns, so years of history load and
+aggregate in milliseconds. NumPy is only imported when a query runs.
+"""
+import os
+import struct
+import sys
+from array import array
+from datetime import datetime, timedelta
+
+from records import Difficulty
+
+MAGIC = b"CXH1"
+HEADER = struct.Struct("<4sI")
+# (attribute, array typecode), in the order the columns are written
+COLUMNS = (("time", "q"), ("xp", "i"), ("tokens", "i"), ("difficulty", "b"), ("priority", "b"))
+
+# a file made of more chunks than this is rewritten as one on load
+MAX_CHUNKS = 64
+
+EPOCH = datetime(1970, 1, 1)
+SECONDS_PER_DAY = 86400
+
+
+def _timestamp(moment):
+    """Seconds since 1970-01-01 in local time, so // 86400 gives the local day."""
+    return int((moment - EPOCH).total_seconds())
+
+
+def _day_number(day):
+    return (day - EPOCH.date()).days
+
+
+def write_chunk(path, chunk):
+    """Appends an encoded chunk to a history file, or empties the file if chunk is None."""
+    with open(path, "wb" if chunk is None else "ab") as f:
+        if chunk is not None:
+            f.write(chunk)
+
+
+class CompletionHistory:
+    """
+    Columns of completed tasks; `path=None` keeps it in memory only. `write`
+    takes the place of write_chunk() for new chunks, so they can be written
+    from another thread (see WriteBehindStorage).
+    """
+
+    def __init__(self, path=None, write=None):
+        self.path = path
+        self.write = write or (lambda chunk: write_chunk(self.path, chunk))
+        for name, typecode in COLUMNS:
+            setattr(self, name, array(typecode))
+        if path is not None:
+            self._load()
+
+    def __len__(self):
+        return len(self.time)
+
+    # --- persistence ---
+    def _columns(self):
+        return [getattr(self, name) for name, _ in COLUMNS]
+
+    @staticmethod
+    def _encode(columns):
+        chunk = [HEADER.pack(MAGIC, len(columns[0]))]
+        for column in columns:
+            if sys.byteorder == "big":
+                column = array(column.typecode, column)
+                column.byteswap()
+            chunk.append(column.tobytes())
+        return b"".join(chunk)
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                blob = f.read()
+        except FileNotFoundError:
+            return
+
+        offset = chunks = 0
+        while offset + HEADER.size <= len(blob):
+            magic, rows = HEADER.unpack_from(blob, offset)
+            end = offset + HEADER.size + rows * sum(array(typecode).itemsize for _, typecode in COLUMNS)
+            if magic != MAGIC or end > len(blob):
+                break  # torn write from a crash, everything after it is garbage
+            offset += HEADER.size
+            for column in self._columns():
+                size = rows * column.itemsize
+                part = array(column.typecode, blob[offset:offset + size])
+                if sys.byteorder == "big":
+                    part.byteswap()
+                column.extend(part)
+                offset += size
+            chunks += 1
+
+        if chunks > MAX_CHUNKS or offset != len(blob):
+            self._rewrite()
+
+    def _rewrite(self):
+        """Replaces the file with a single chunk holding everything."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            if len(self):
+                f.write(self._encode(self._columns()))
+        os.replace(tmp_path, self.path)
+
+    # --- writing ---
+    def append(self, moment, rows):
+        """Adds completions made at `moment`, rows being (task, tokens, xp) tuples."""
+        if not rows:
+            return
+        stamp = _timestamp(moment)
+        new = [array(typecode) for _, typecode in COLUMNS]
+        for task, tokens, xp in rows:
+            new[0].append(stamp)
+            new[1].append(xp)
+            new[2].append(tokens)
+            new[3].append(task.difficulty)
+            new[4].append(task.priority)
+
+        for column, part in zip(self._columns(), new):
+            column.extend(part)
+        if self.path is not None:
+            self.write(self._encode(new))
+
+    def clear(self):
+        for column in self._columns():
+            del column[:]
+        if self.path is not None:
+            self.write(None)
+
+    # --- queries ---
+    def _arrays(self):
+        import numpy as np
+        return np, {name: np.frombuffer(getattr(self, name), dtype=typecode) for name, typecode in COLUMNS}
+
+    @staticmethod
+    def _day_range(np, days, start, end):
+        """Boolean mask for day numbers in start..end (dates, either may be None)."""
+        mask = np.ones(days.shape, dtype=bool)
+        if start is not None:
+            mask &= days >= _day_number(start)
+        if end is not None:
+            mask &= days <= _day_number(end)
+        return mask
+
+    def per_day(self, column="xp", start=None, end=None):
+        """{date: total of `column`} for every day with a completion (column may be "count")."""
+        if not len(self):
+            return {}
+        np, columns = self._arrays()
+        days = columns["time"] // SECONDS_PER_DAY
+        mask = self._day_range(np, days, start, end)
+        days = days[mask]
+        if not days.size:
+            return {}
+        weights = None if column == "count" else columns[column][mask]
+        first = days.min()
+        totals = np.bincount(days - first, weights=weights)
+        present = np.flatnonzero(np.bincount(days - first))
+        return {
+            EPOCH.date() + timedelta(days=int(first + index)): int(totals[index])
+            for index in present
+        }
+
+    def per_week(self, column="xp", start=None, end=None):
+        """{monday: total of `column`} for every week with a completion."""
+        weeks = {}
+        for day, total in self.per_day(column, start, end).items():
+            monday = day - timedelta(days=day.weekday())
+            weeks[monday] = weeks.get(monday, 0) + total
+        return weeks
+
+    def by_difficulty(self):
+        """{Difficulty: number of completed tasks}."""
+        counts = [0] * len(Difficulty)
+        if len(self):
+            np, columns = self._arrays()
+            counts = np.bincount(columns["difficulty"], minlength=len(Difficulty)).tolist()
+        return {difficulty: counts[difficulty] for difficulty in Difficulty}
+
+    def totals(self, start=None, end=None):
+        """(completions, xp, tokens) in the given day range."""
+        if not len(self):
+            return 0, 0, 0
+        np, columns = self._arrays()
+        mask = self._day_range(np, columns["time"] // SECONDS_PER_DAY, start, end)
+        return (
+            int(mask.sum()),
+            int(columns["xp"][mask].sum(dtype=np.int64)),
+            int(columns["tokens"][mask].sum(dtype=np.int64))
+        )
+
+    def longest_streak(self, min_per_day=1):
+        """Longest run of consecutive days with at least `min_per_day` completions, as (length, first day)."""
+        if not len(self):
+            return 0, None
+        np, columns = self._arrays()
+        days, counts = np.unique(columns["time"] // SECONDS_PER_DAY, return_counts=True)
+        days = days[counts >= min_per_day]
+        if not days.size:
+            return 0, None
+        # a new run starts wherever the gap to the previous day is not exactly one
+        starts = np.flatnonzero(np.diff(days, prepend=days[0] - 2) != 1)
+        lengths = np.diff(np.append(starts, days.size))
+        best = int(lengths.argmax())
+        return int(lengths[best]), EPOCH.date() + timedelta(days=int(days[starts[best]]))
@@ -0,0 +1,185 @@
+"""
+Leaderboards across profiles: by level (then XP), by current streak and by
+tokens earned this week (Monday to Sunday).
+
+Each board keeps every profile's score in a list sorted best first, kept in
+order with bisect as scores change, so the top K is a slice and a profile's
+rank is a binary search. Scores are pushed in by the profiles themselves:
+ProfileManager subscribes the leaderboards to each loaded ToDoLogic's events,
+so whatever changes XP, level or the streak (completing tasks, level-ups,
+streak updates, the daily penalties) updates the boards at the same moment.
+The last known score of every profile is saved to leaderboards.json, so
+ranking never needs to load a profile.
+"""
+import json
+import os
+import time
+from bisect import bisect_left, insort
+from datetime import timedelta
+
+from clock import SystemClock
+from events import Event
+
+# the events after which a profile's scores may have changed
+SCORE_EVENTS = {Event.LEVEL_CHANGED, Event.STREAK_CHANGED, Event.STATS_CHANGED}
+
+# evicting profiles saves at most this often (seconds), closing always saves
+SAVE_INTERVAL = 5.0
+
+
+def _monday(day):
+    return day - timedelta(days=day.weekday())
+
+
+class Board:
+    """Every profile's score on one board, sorted best first; scores are numbers or tuples (higher wins)."""
+
+    def __init__(self):
+        self.order = []     # (negated score, name), ascending, so the best come first
+        self.scores = {}    # name -> negated score
+
+    @staticmethod
+    def _key(score):
+        return tuple(-value for value in score) if isinstance(score, tuple) else -score
+
+    def update(self, name, score):
+        key = self._key(score)
+        old = self.scores.get(name)
+        if old == key:
+            return
+        if old is not None:
+            del self.order[bisect_left(self.order, (old, name))]
+        self.scores[name] = key
+        insort(self.order, (key, name))
+
+    def remove(self, name):
+        old = self.scores.pop(name, None)
+        if old is not None:
+            del self.order[bisect_left(self.order, (old, name))]
+
+    def rank(self, name):
+        """1-based position of a profile, or None if it isn't on the board."""
+        key = self.scores.get(name)
+        return None if key is None else bisect_left(self.order, (key, name)) + 1
+
+    def __iter__(self):
+        """(name, score), best first."""
+        for key, name in self.order:
+            yield name, self._key(key)
+
+    def __len__(self):
+        return len(self.order)
+
+
+class Leaderboards:
+    def __init__(self, path=None, clock=None):
+        self.path = path
+        self.clock = clock or SystemClock()     # what "this week" and a live streak are measured against
+        self.entries = {}   # name -> last known scores, as saved
+        self.level = Board()
+        self.streak = Board()
+        self.weekly_tokens = {}     # monday -> Board, only weeks somebody earned something in
+        self.changed = False        # entries differ from the file
+        self.saved_at = 0.0         # time.monotonic() of the last save
+        if path is not None:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                entries = {}
+            for name, entry in entries.items():
+                self._apply(name, entry)
+            self.changed = False
+
+    def _apply(self, name, entry):
+        old = self.entries.get(name)
+        if old == entry:
+            return
+        self.changed = True
+        self.entries[name] = entry
+        self.level.update(name, (entry["level"], entry["xp"]))
+        self.streak.update(name, entry["streak_days"])
+        if old is not None and old["week"] != entry["week"]:
+            self._remove_from_week(old["week"], name)
+        if entry["week_tokens"]:
+            self.weekly_tokens.setdefault(entry["week"], Board()).update(name, entry["week_tokens"])
+
+    def update(self, name, logic):
+        """Reads a profile's current scores from its ToDoLogic."""
+        today = logic.clock.today()
+        monday = _monday(today)
+        week_tokens = 0
+        for offset in range((today - monday).days + 1):
+            week_tokens += logic.stats.days.get(monday + timedelta(days=offset), {}).get("tokens", 0)
+        self._apply(name, {
+            "level": logic.level,
+            "xp": logic.xp,
+            "streak_days": logic.streak_days,
+            "last_streak_date": logic.last_streak_date.isoformat(),
+            "paused_until": logic.paused_until.isoformat() if logic.paused_until else None,
+            "week": monday.isoformat(),
+            "week_tokens": week_tokens,
+        })
+
+    def watch(self, name, logic):
+        """Keeps a loaded profile's scores up to date from its events."""
+        self.update(name, logic)
+        logic.events.subscribe(lambda changes: self.update(name, logic), SCORE_EVENTS)
+
+    def remove(self, name):
+        entry = self.entries.pop(name, None)
+        if entry is not None:
+            self.changed = True
+            self.level.remove(name)
+            self.streak.remove(name)
+            self._remove_from_week(entry["week"], name)
+
+    def _remove_from_week(self, week, name):
+        board = self.weekly_tokens.get(week)
+        if board is not None:
+            board.remove(name)
+            if not board:
+                del self.weekly_tokens[week]
+
+    # --- rankings: lists of (name, score), best first ---
+    def top_level(self, k=10):
+        """Scores are (level, xp)."""
+        return self._top(self.level, k)
+
+    def top_streak(self, k=10, today=None):
+        """Streaks that can still go on; a profile that hasn't come back since its streak broke drops out."""
+        yesterday = (today or self.clock.today()) - timedelta(days=1)
+
+        def alive(name):
+            entry = self.entries[name]
+            # its own daily check resets a broken streak only on the next login
+            last = max(entry["last_streak_date"], entry["paused_until"] or "")
+            return last >= yesterday.isoformat()
+
+        return [(name, days) for name, days in self._top(self.streak, k, alive) if days > 0]
+
+    def top_weekly_tokens(self, k=10, today=None):
+        board = self.weekly_tokens.get(_monday(today or self.clock.today()).isoformat(), Board())
+        return self._top(board, k)
+
+    @staticmethod
+    def _top(board, k, keep=None):
+        top = []
+        for name, score in board:
+            if len(top) == k:
+                break
+            if keep is None or keep(name):
+                top.append((name, score))
+        return top
+
+    def save(self, min_interval=0):
+        """Writes the entries if they changed, and if min_interval seconds passed since the last save."""
+        if self.path is None or not self.changed or time.monotonic() - self.saved_at < min_interval:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        self.changed = False
+        self.saved_at = time.monotonic()
@@ -0,0 +1,178 @@
+"""
+Load test for server.py: many keep-alive connections sending a mix of reads
+and writes, reporting throughput and latency percentiles.
+
+    python loadtest.py --spawn --connections 50 --requests 20000
+
+--spawn starts its own server on a throwaway data file and afterwards checks
+that no update was lost (the tokens held equal the tokens earned minus the
+tokens spent); without it the server at --host/--port is used as it is.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# (weight, method, path, body) of the requests each connection picks from;
+# "{task}" / "{item}" are replaced by ids this connection created
+MIX = (
+    (30, "GET", "/status", None),
+    (15, "GET", "/tasks?limit=20", None),
+    (25, "POST", "/tasks", {"name": "Load test task", "difficulty": "Medium", "priority": "High"}),
+    (20, "POST", "/tasks/complete", {"ids": ["{task}"]}),
+    (4, "POST", "/shop", {"name": "Load test reward", "price": 50}),
+    (4, "POST", "/shop/{item}/buy", None),
+    (2, "GET", "/stats", None),
+)
+
+
+class Client:
+    """One keep-alive HTTP/1.1 connection."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host, port):
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def request(self, method, path, body=None):
+        payload = json.dumps(body).encode() if body is not None else b""
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n".encode() + payload
+        )
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+    def close(self):
+        self.writer.close()
+
+
+async def worker(host, port, count, seed, latencies, statuses):
+    rng = random.Random(seed)
+    client = await Client.connect(host, port)
+    tasks, items = [], []
+    weights = [weight for weight, *_ in MIX]
+    try:
+        for _ in range(count):
+            _, method, path, body = rng.choices(MIX, weights)[0]
+            if "{task}" in json.dumps(body):
+                if not tasks:
+                    method, path, body = "GET", "/status", None
+                else:
+                    body = {"ids": [tasks.pop()]}
+            if "{item}" in path:
+                if not items:
+                    method, path = "GET", "/status"
+                else:
+                    path = path.replace("{item}", str(items.pop()))
+
+            started = time.perf_counter()
+            status, response = await client.request(method, path, body)
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+            if method == "POST" and path == "/tasks" and response.get("ok"):
+                tasks.append(response["id"])
+            elif method == "POST" and path == "/shop" and response.get("ok"):
+                items.append(response["id"])
+    finally:
+        client.close()
+
+
+async def run(host, port, connections, requests, seed):
+    latencies, statuses = [], {}
+    per_connection = max(1, requests // connections)
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        worker(host, port, per_connection, seed + index, latencies, statuses) for index in range(connections)
+    ))
+    elapsed = time.perf_counter() - started
+
+    client = await Client.connect(host, port)
+    _, status = await client.request("GET", "/status")
+    _, stats = await client.request("GET", "/stats")
+    client.close()
+    return latencies, statuses, elapsed, status["status"], stats["stats"]["all_time"]
+
+
+async def wait_for_server(host, port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the Codex HTTP server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--connections", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--spawn", action="store_true", help="start a server on a temporary data file")
+    args = parser.parse_args(argv)
+
+    server = folder = None
+    if args.spawn:
+        folder = tempfile.TemporaryDirectory()
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py"),
+             "--host", args.host, "--port", str(args.port)],
+            env={**os.environ, "CODEX_DATA": os.path.join(folder.name, "data.json")},
+            stdout=subprocess.DEVNULL
+        )
+    try:
+        asyncio.run(wait_for_server(args.host, args.port))
+        latencies, statuses, elapsed, status, totals = asyncio.run(
+            run(args.host, args.port, args.connections, args.requests, args.seed)
+        )
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+            folder.cleanup()
+
+    latencies.sort()
+    percentile = lambda fraction: latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000
+    print(f"{len(latencies)} requests over {args.connections} connections in {elapsed:.2f}s"
+          f" = {len(latencies) / elapsed:.0f} requests/s")
+    print(f"latency ms: mean {statistics.mean(latencies) * 1000:.2f}, p50 {percentile(0.5):.2f},"
+          f" p90 {percentile(0.9):.2f}, p99 {percentile(0.99):.2f}, max {latencies[-1] * 1000:.2f}")
+    print("statuses: " + ", ".join(f"{code} x{count}" for code, count in sorted(statuses.items())))
+
+    if args.spawn:
+        # a fresh profile holds exactly what it earned minus what it spent, unless an update was lost
+        expected = totals["tokens"] - totals["spent"]
+        print(f"tokens {status['tokens']}, earned - spent {expected}: "
+              + ("consistent" if status["tokens"] == expected else "MISMATCH"))
+        return 0 if status["tokens"] == expected else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,14 @@
-import json
+from bisect import bisect_right
+from collections import OrderedDict
+from clock import SystemClock
 from datetime import datetime, date, timedelta
+from itertools import islice
+import recurrence
+from events import Event, EventBus
+from records import Difficulty, Priority, Task, MandatoryTask, ShopItem, parse_due
+from stats import RollingStats
+from storage import default_storage
+from task_store import MandatoryTaskStore
 
 # did you know that you can make constants in python by declaring them in all caps?
 # i took 2 years programming to realize that lol
@@ -9,136 +18,249 @@ TASKS_FOR_STREAK = 3
 STREAK_MULTIPLIER_INCREASE = 0.2
 XP_PENALTY_PER_URGENT_TASK = 30
 MANDATORY_TASKS_TO_SKIP_DAY = 2
+LEVEL_GROWTH = 1.5
+
+# level curves kept by LevelCurve.containing(); an old save can start one off the usual curve
+MAX_LEVEL_CURVES = 8
+
+# reward tables, indexed by Difficulty and Priority values
+DIFFICULTY_WEIGHT = (1, 2, 3, 5, 7)
+PRIORITY_MULTIPLIER = (1, 1, 1.25, 1.5, 2)
+
+# (tokens, xp) before the streak multiplier, REWARD_TABLE[difficulty][priority]
+REWARD_TABLE = tuple(
+    tuple((10 * weight * multiplier, 15 * weight * multiplier) for multiplier in PRIORITY_MULTIPLIER)
+    for weight in DIFFICULTY_WEIGHT
+)
+
+# record class stored in each collection (journal records and data.json use dicts)
+RECORD_TYPES = {"tasks": Task, "mandatory_tasks": MandatoryTask, "shop_items": ShopItem}
+
+# event published for each (journal op, collection)
+RECORD_EVENTS = {
+    ("add", "tasks"): Event.TASK_ADDED,
+    ("add", "mandatory_tasks"): Event.TASK_ADDED,
+    ("add", "shop_items"): Event.SHOP_ITEM_ADDED,
+    ("del", "tasks"): Event.TASK_REMOVED,
+    ("del", "mandatory_tasks"): Event.TASK_REMOVED,
+    ("del", "shop_items"): Event.SHOP_ITEM_REMOVED,
+    ("set", "mandatory_tasks"): Event.TASK_UPDATED,
+    ("deadline", "tasks"): Event.TASK_UPDATED,
+    ("escalate", None): Event.TASK_UPDATED,
+    ("new_day", None): Event.TASK_UPDATED
+}
+
+
+def count_weekdays(start, days):
+    """Counts the Monday-Saturday dates among `days` consecutive days from `start`."""
+    full_weeks, extra_days = divmod(days, 7)
+    count = full_weeks * 6 + extra_days
+    # the leftover days include a Sunday if it comes before they run out
+    if extra_days > (6 - start.weekday()):
+        count -= 1
+    return count
+
+
+class LevelCurve:
+    """
+    XP thresholds of consecutive levels (each one int(previous * LEVEL_GROWTH))
+    with their running totals, extended lazily and searched with bisect.
+    """
+
+    # cached curves by first threshold, least recently used first
+    _curves = OrderedDict()
+
+    def __init__(self, first_threshold):
+        self.thresholds = [first_threshold]
+        self.cumulative = [0, first_threshold]    # cumulative[i] = sum(thresholds[:i])
+        self.position = {first_threshold: 0}
+
+    def _extend(self, total):
+        """Adds levels until the running total exceeds `total`."""
+        while self.cumulative[-1] <= total:
+            threshold = int(self.thresholds[-1] * LEVEL_GROWTH)
+            self.position[threshold] = len(self.thresholds)
+            self.thresholds.append(threshold)
+            self.cumulative.append(self.cumulative[-1] + threshold)
+
+    def resolve(self, threshold, xp):
+        """Returns (levels gained, XP left over, next threshold) for `xp` at `threshold`."""
+        start = self.position[threshold]
+        base = self.cumulative[start]
+        self._extend(base + xp)
+        end = bisect_right(self.cumulative, base + xp) - 1
+        return end - start, xp - (self.cumulative[end] - base), self.thresholds[end]
+
+    @classmethod
+    def containing(cls, threshold):
+        """Returns a cached curve that passes through `threshold`, creating one if needed."""
+        # at most MAX_LEVEL_CURVES to look through, the one used last first
+        for curve in reversed(cls._curves.values()):
+            if threshold in curve.position:
+                cls._curves.move_to_end(curve.thresholds[0])
+                return curve
+        curve = cls._curves[threshold] = cls(threshold)
+        if len(cls._curves) > MAX_LEVEL_CURVES:
+            cls._curves.popitem(last=False)
+        return curve
 
 
 class ToDoLogic:
     """Main application logic: tasks, rewards, streaks, and persistence."""
 
-    def __init__(self):
+    def __init__(self, storage=None, clock=None):
+        self.storage = storage or default_storage()
+        self.clock = clock or SystemClock()  # see clock.py, simulations pass a SimulatedClock
+        self.events = EventBus()
         self.load_data()
 
-    # sorting logic
-    def _sort_tasks(self):
-        """Sorts regular tasks by priority (highest first)."""
-        priority_map = {
-            "Urgent": 4,
-            "High": 3,
-            "Medium": 2,
-            "Low": 1,
-            "Irrelevant": 0
-        }
-        self.tasks.sort(
-            key=lambda task: priority_map.get(task.get('priority'), 0),
-            reverse=True
-        )
+    # tasks, mandatory tasks and shop items are keyed by id and kept in display
+    # order, so lookups and removals by id are O(1) and never shift anything.
+    # regular tasks live in per-priority buckets (see PriorityTaskStore, or the
+    # tasks table itself with SQLite, see SqliteTaskStore),
+    # mandatory tasks in a next-due-day heap (see MandatoryTaskStore)
+
+    def _new_id(self):
+        """Hands out a persistent id, unique across tasks and shop items."""
+        new_id = self.next_id
+        self.next_id += 1
+        return new_id
+
+    def _from_dict(self, list_name):
+        """Builds a record of the given collection from its dict."""
+        if list_name == "mandatory_tasks":
+            # the save's last login, not today: an old completed_today flag was set on or before it
+            saved_on = self.last_login_date
+            return lambda data: MandatoryTask.from_dict(data, saved_on)
+        return RECORD_TYPES[list_name].from_dict
+
+    def _index(self, records, list_name):
+        """Builds records from loaded dicts keyed by id, giving ones from older saves a fresh id."""
+        from_dict = self._from_dict(list_name)
+        indexed = {}
+        for data in records:
+            if 'id' not in data:
+                data['id'] = self._new_id()
+            indexed[data['id']] = from_dict(data)
+        return indexed
 
+    # sorting logic
     def _sort_shop_items(self):
         """Sorts shop items by ascending price."""
-        self.shop_items.sort(key=lambda item: item.get('price', 0))
-
-    def _sort_mandatory_tasks(self):
-        """Sorts mandatory tasks by activation weekday."""
-        self.mandatory_tasks.sort(key=lambda task: task.get('activation_day', 0))
+        self.shop_items = dict(sorted(self.shop_items.items(), key=lambda entry: entry[1].price))
 
     # task logic
-    def add_task(self, name, difficulty, priority):
-        """Adds a new regular task."""
+    def add_task(self, name, difficulty, priority, due=None):
+        """Adds a new regular task, optionally with a deadline (see parse_due)."""
         if not name:
             return False, "Task name cannot be empty."
-
-        task = {
-            "name": name,
-            "difficulty": difficulty,
-            "priority": priority
-        }
-        self.tasks.append(task)
-        self._sort_tasks()
+        try:
+            difficulty = Difficulty.coerce(difficulty)
+            priority = Priority.coerce(priority)
+            due = parse_due(due)
+        except ValueError as e:
+            return False, str(e)
+
+        task = Task(self._new_id(), name, difficulty, priority, due)
+        self.tasks.add(task)
+        self.stats.add(added=1)
+        self._record("add", list="tasks", item=task.to_dict())
         return True, "Task added successfully."
 
-    def add_mandatory_task(self, name, activation_day):
-        """Adds a new mandatory (recurring) task."""
+    def add_mandatory_task(self, name, rule):
+        """Adds a new mandatory (recurring) task; rule is a weekday number, a rule or its text form."""
         if not name:
             return False, "Task name cannot be empty."
 
-        task = {
-            "name": name,
-            "activation_day": activation_day,
-            "completed_today": False  # tracks daily completion
-        }
-        self.mandatory_tasks.append(task)
-        self._sort_mandatory_tasks()
+        try:
+            rule = recurrence.coerce(rule, self.clock.today())
+        except ValueError as e:
+            return False, str(e)
+
+        task = MandatoryTask(self._new_id(), name, rule)
+        self.mandatory_tasks.add(task)
+        self._record("add", list="mandatory_tasks", item=task.to_dict())
         return True, "Mandatory task added successfully."
 
-    def delete_task(self, selected_index):
-        """Deletes a regular task by index."""
-        if 0 <= selected_index < len(self.tasks):
-            del self.tasks[selected_index]
+    def delete_task(self, task_id):
+        """Deletes a regular task by id."""
+        if self.tasks.pop(task_id, None) is not None:
+            self._record("del", list="tasks", id=task_id)
             return True, "Task deleted."
-        return False, "Invalid index."
+        return False, "Task not found."
 
-    def delete_mandatory_task(self, selected_index):
-        """Deletes a mandatory task by index."""
-        if 0 <= selected_index < len(self.mandatory_tasks):
-            del self.mandatory_tasks[selected_index]
+    def delete_mandatory_task(self, task_id):
+        """Deletes a mandatory task by id."""
+        if self.mandatory_tasks.pop(task_id, None) is not None:
+            self._record("del", list="mandatory_tasks", id=task_id)
             return True, "Mandatory task deleted."
-        return False, "Invalid index."
+        return False, "Task not found."
 
-    def complete_task(self, selected_index):
+    def complete_task(self, task_id):
         """Completes a regular task and grants rewards."""
-        if not (0 <= selected_index < len(self.tasks)):
-            return None, "Invalid index."
-
-        task = self.tasks.pop(selected_index)
-
-        difficulty_map = {
-            "Very Easy": 1,
-            "Easy": 2,
-            "Medium": 3,
-            "Hard": 5,
-            "Very Hard": 7
-        }
-        priority_map = {
-            "Irrelevant": 1,
-            "Low": 1,
-            "Medium": 1.25,
-            "High": 1.5,
-            "Urgent": 2
-        }
-
-        base_tokens = 10 * difficulty_map[task['difficulty']]
-        base_xp = 15 * difficulty_map[task['difficulty']]
-
-        tokens_earned = int(base_tokens * priority_map[task['priority']] * self.streak_multiplier)
-        xp_earned = int(base_xp * priority_map[task['priority']] * self.streak_multiplier)
+        if task_id not in self.tasks:
+            return None, "Task not found."
+        return self.complete_tasks([task_id])[1]
+
+    @staticmethod
+    def _rewards(tasks, streak_multiplier):
+        """(task, tokens, xp) for each of `tasks`, truncating each task's reward like before."""
+        rewards = []
+        for task in tasks:
+            base_tokens, base_xp = REWARD_TABLE[task.difficulty][task.priority]
+            rewards.append((task, int(base_tokens * streak_multiplier), int(base_xp * streak_multiplier)))
+        return rewards
+
+    def complete_tasks(self, task_ids):
+        """Completes several regular tasks at once and grants their rewards."""
+        tasks = [task for task in map(self.tasks.pop, dict.fromkeys(task_ids)) if task is not None]
+        if not tasks:
+            return False, "Task not found."
+
+        # the streak can only change on the completion that reaches TASKS_FOR_STREAK,
+        # so that one and every task before it earn at the current multiplier
+        at_old_multiplier = max(0, TASKS_FOR_STREAK - self.tasks_completed_today - 1) + 1
+        rewards = self._rewards(tasks[:at_old_multiplier], self.streak_multiplier)
+        self.update_streak(len(tasks))
+        rewards += self._rewards(tasks[at_old_multiplier:], self.streak_multiplier)
+        tokens_earned = sum(tokens for _, tokens, _ in rewards)
+        xp_earned = sum(xp for _, _, xp in rewards)
 
         self.tokens += tokens_earned
         self.xp += xp_earned
+        self.history.append(self.clock.now(), rewards)
+        self.stats.add(xp=xp_earned, tokens=tokens_earned, completed=len(tasks))
 
-        self.update_streak()
-        level_up_info = self.check_level_up()
+        levels_gained, _ = self.check_level_up()
+        if len(tasks) == 1:
+            self._record("del", list="tasks", id=tasks[0].id)
+            message = f"You earned {tokens_earned} Tokens and {xp_earned} XP!"
+        else:
+            self._record("del", list="tasks", ids=[task.id for task in tasks])
+            message = f"You completed {len(tasks)} tasks and earned {tokens_earned} Tokens and {xp_earned} XP!"
 
-        message = f"You earned {tokens_earned} Tokens and {xp_earned} XP!"
-        if level_up_info:
-            message += "\n" + level_up_info
+        if levels_gained:
+            message += "\n" + self.level_up_message(levels_gained)
 
-        return message
+        return True, message
 
-    def complete_mandatory_task(self, selected_index):
+    def complete_mandatory_task(self, task_id):
         """Completes a mandatory task if it is active today."""
-        if not (0 <= selected_index < len(self.mandatory_tasks)):
-            return None, "Invalid index."
+        task = self.mandatory_tasks.get(task_id)
+        if task is None:
+            return None, "Task not found."
 
-        task = self.mandatory_tasks[selected_index]
-        today = date.today()
+        today = self.clock.today()
 
-        if today.weekday() != task['activation_day']:
+        if not self.mandatory_tasks.is_due(task, today):
             return "This task is not active today."
 
-        if task.get('completed_today', False):
+        if task.completed_on == today:
             return "This task has already been completed today."
 
-        task['completed_today'] = True
+        task.completed_on = today
         self.mandatory_tasks_completed_today += 1
+        self.stats.add(mandatory=1)
 
         message = "Mandatory task completed!"
 
@@ -150,8 +272,33 @@ class ToDoLogic:
                 "mandatory tasks and skipped the day!"
             )
 
+        self._record("set", list="mandatory_tasks", item=task.to_dict())
         return message
 
+    # queries (answered by the storage indexes when the backend has them)
+    def count_tasks(self, priority=None):
+        """Counts regular tasks, optionally only those of one priority."""
+        if priority is None:
+            return len(self.tasks)
+        return self.tasks.count(Priority.coerce(priority))
+
+    def get_tasks_page(self, offset, limit):
+        """Returns a slice of the regular tasks in priority order."""
+        return self.tasks.page(offset, limit)
+
+    def get_mandatory_tasks_for_day(self, day):
+        """Returns the mandatory tasks due on the given date."""
+        return self.mandatory_tasks.due_on(day)
+
+    def get_shop_items_page(self, offset, limit, max_price=None):
+        """Returns a slice of the shop items by price, optionally only affordable ones."""
+        if self.storage.queryable:
+            return [ShopItem.from_dict(data) for data in self.storage.shop_items_page(offset, limit, max_price)]
+        items = self.shop_items.values()
+        if max_price is not None:
+            items = (item for item in items if item.price <= max_price)
+        return list(islice(items, offset, offset + limit))
+
     # shop logic
     def add_shop_item(self, name, price_str):
         if not name or not price_str:
@@ -160,43 +307,84 @@ class ToDoLogic:
             price = int(price_str)
             if price <= 0:
                 raise ValueError
-            self.shop_items.append({"name": name, "price": price})
+            item = ShopItem(self._new_id(), name, price)
+            self.shop_items[item.id] = item
             self._sort_shop_items()
+            self._record("add", list="shop_items", item=item.to_dict())
             return True, "Reward added successfully."
         except ValueError:
             return False, "Price must be a positive number."
 
-    def buy_item(self, selected_index):
-        if not (0 <= selected_index < len(self.shop_items)):
+    def buy_item(self, item_id):
+        item = self.shop_items.get(item_id)
+        if item is None:
             return False, "Select a reward to purchase."
 
-        item = self.shop_items[selected_index]
-        if self.tokens >= item['price']:
-            self.tokens -= item['price']
-            del self.shop_items[selected_index]
-            return True, f"You purchased '{item['name']}'!"
+        if self.tokens >= item.price:
+            self.tokens -= item.price
+            self.stats.add(spent=item.price)
+            del self.shop_items[item_id]
+            self._record("del", list="shop_items", id=item_id)
+            return True, f"You purchased '{item.name}'!"
         return False, "You do not have enough Tokens."
 
+    # bulk import (see transfer.py)
+    def add_many(self, list_name, records):
+        """
+        Adds records (Task, MandatoryTask or ShopItem, any id) in bulk, giving each a
+        fresh id. The shop is sorted once at the end, and everything is saved as one
+        snapshot instead of a journal record per item. Returns how many were added.
+        """
+        count = 0
+        if list_name == "shop_items":
+            for item in records:
+                item.id = self._new_id()
+                self.shop_items[item.id] = item
+                count += 1
+            self._sort_shop_items()
+        else:
+            store = getattr(self, list_name)
+            for record in records:
+                record.id = self._new_id()
+                store.add(record)
+                count += 1
+        if not count:
+            return 0
+
+        if list_name == "tasks":
+            self.stats.add(added=count)
+            self.stats.take_pending()  # already in the snapshot
+            self.events.emit(Event.STATS_CHANGED)
+        self.compact()
+        self._publish("add", {"list": list_name})
+        return count
+
     # gamification wow so cool
     def check_level_up(self):
-        """Handles level-ups based on XP."""
-        messages = []
-        while self.xp >= self.xp_to_next_level:
-            self.xp -= self.xp_to_next_level
-            self.level += 1
-            self.xp_to_next_level = int(self.xp_to_next_level * 1.5)
-            messages.append(f"Congratulations! You reached Level {self.level}!")
-        return "\n".join(messages)
-
-    def update_streak(self):
+        """Handles level-ups based on XP. Returns (levels gained, new XP threshold)."""
+        if self.xp < self.xp_to_next_level:
+            return 0, self.xp_to_next_level
+
+        curve = LevelCurve.containing(self.xp_to_next_level)
+        levels_gained, self.xp, self.xp_to_next_level = curve.resolve(self.xp_to_next_level, self.xp)
+        self.level += levels_gained
+        return levels_gained, self.xp_to_next_level
+
+    def level_up_message(self, levels_gained):
+        if levels_gained == 1:
+            return f"Congratulations! You reached Level {self.level}!"
+        return f"Congratulations! You gained {levels_gained} levels and reached Level {self.level}!"
+
+    def update_streak(self, completed=1):
         """Updates the streak multiplier based on daily task completion."""
-        today = date.today()
-        self.tasks_completed_today += 1
+        today = self.clock.today()
+        self.tasks_completed_today += completed
 
         if self.tasks_completed_today >= TASKS_FOR_STREAK:
             if self.last_streak_date == today - timedelta(days=1):
                 self.streak_days += 1
             elif self.last_streak_date != today:
+                self.stats.add(streak_ended=self.streak_days)
                 self.streak_days = 1
 
             self.streak_multiplier = 1.0 + (self.streak_days * STREAK_MULTIPLIER_INCREASE)
@@ -205,7 +393,7 @@ class ToDoLogic:
     # daily and weekly status logic
     def check_daily_status(self):
         """Applies daily penalties, resets, and mandatory task states."""
-        today = date.today()
+        today = self.clock.today()
         messages = []
 
         if today > self.last_login_date:
@@ -217,45 +405,74 @@ class ToDoLogic:
             if not yesterday_was_paused and self.last_streak_date < yesterday:
                 if self.streak_days > 0:
                     messages.append(("info", "Streak Broken", "Your streak has been reset."))
+                    self.stats.add(streak_ended=self.streak_days)
                 self.streak_days = 0
                 self.streak_multiplier = 1.0
 
-            for i in range(days_since_last_login):
-                check_date = self.last_login_date + timedelta(days=i + 1)
-
-                if self.paused_until and check_date == self.paused_until:
-                    messages.append(("info", "Day Paused", f"The day {check_date:%d/%m} was paused."))
-                    continue
-
-                if check_date.weekday() < 6:
-                    self.xp = max(0, self.xp - XP_LOSS_PER_DAY)
-                    messages.append(("warning", "Penalty", f"You lost {XP_LOSS_PER_DAY} XP due to inactivity."))
-
+            # every day since the last login except Sundays and the paused day costs XP,
+            # counted in one go so a long absence is as cheap as a single day
+            first_missed = self.last_login_date + timedelta(days=1)
+            penalized_days = count_weekdays(first_missed, days_since_last_login)
+
+            if self.paused_until and first_missed <= self.paused_until <= today:
+                messages.append(("info", "Day Paused", f"The day {self.paused_until:%d/%m} was paused."))
+                if self.paused_until.weekday() < 6:
+                    penalized_days -= 1
+
+            if penalized_days > 0:
+                total_loss = penalized_days * XP_LOSS_PER_DAY
+                self.stats.add(xp_lost_inactivity=min(self.xp, total_loss))
+                self.xp = max(0, self.xp - total_loss)
+                messages.append((
+                    "warning", "Penalty",
+                    f"You lost {total_loss} XP due to {penalized_days} day(s) of inactivity."
+                ))
+
+            # only the mandatory tasks that came due since the last login are looked at,
+            # each one's skipped days counted in one go
+            missed = self.mandatory_tasks.advance(today)
+            if missed:
+                messages.append((
+                    "info", "Mandatory Tasks",
+                    f"{missed} mandatory task(s) went uncompleted since your last login."
+                ))
+
+            # mandatory tasks carry the date they were completed on, so they need no reset
             self.tasks_completed_today = 0
             self.mandatory_tasks_completed_today = 0
 
-            for task in self.mandatory_tasks:
-                task['completed_today'] = False
+            self.last_login_date = today
+            self._record("new_day")
+            return messages
 
         self.last_login_date = today
+        self._record("state")
         return messages
 
     def _increase_task_priorities(self):
         """Escalates task priorities weekly."""
-        priority_map = {
-            "Low": "Medium",
-            "Medium": "High",
-            "High": "Urgent"
-        }
-        for task in self.tasks:
-            if task['priority'] in priority_map:
-                task['priority'] = priority_map[task['priority']]
-        self._sort_tasks()
+        self.tasks.escalate()
+
+    def next_deadline(self):
+        """When the next task deadline passes, or None; the GUI sets its timer for this."""
+        return self.tasks.next_deadline()
+
+    def check_deadlines(self, now=None):
+        """Makes every task whose deadline has passed Urgent, returns those tasks."""
+        now = now or self.clock.now()
+        escalated = [task for task in self.tasks.pop_overdue(now) if task.priority < Priority.URGENT]
+        if escalated:
+            ids = [task.id for task in escalated]
+            for task_id in ids:
+                self.tasks.promote(task_id, Priority.URGENT)
+            self._record("deadline", list="tasks", ids=ids)
+        return escalated
 
     def _apply_urgent_task_penalty(self):
-        urgent_count = sum(1 for task in self.tasks if task['priority'] == 'Urgent')
+        urgent_count = self.count_tasks(Priority.URGENT)
         if urgent_count > 0:
             total_loss = urgent_count * XP_PENALTY_PER_URGENT_TASK
+            self.stats.add(xp_lost_urgent=min(self.xp, total_loss))
             self.xp = max(0, self.xp - total_loss)
             self.pending_weekly_message = (
                 f"Weekly Report:\n\nYou lost {total_loss} XP for not completing "
@@ -264,10 +481,11 @@ class ToDoLogic:
 
     def check_weekly_updates(self):
         """Runs weekly maintenance tasks."""
-        today = date.today()
+        today = self.clock.today()
 
         if self.last_weekly_check_date is None:
             self.last_weekly_check_date = today
+            self._record("state")
             return
 
         last_offset = (self.last_weekly_check_date.weekday() + 1) % 7
@@ -280,17 +498,22 @@ class ToDoLogic:
             self._apply_urgent_task_penalty()
             self._increase_task_priorities()
             self.last_weekly_check_date = today
+            self._record("escalate")
 
     def get_and_clear_pending_message(self):
         message = self.pending_weekly_message
         self.pending_weekly_message = None
+        if message:
+            self._record("state")
         return message
 
     def pause_day(self):
         """Pauses the current day by spending tokens."""
         if self.tokens >= PAUSE_COST:
             self.tokens -= PAUSE_COST
-            self.paused_until = date.today()
+            self.stats.add(spent=PAUSE_COST)
+            self.paused_until = self.clock.today()
+            self._record("state")
             return True, "You successfully paused today."
         return False, f"You need {PAUSE_COST} Tokens to pause the day."
 
@@ -304,23 +527,30 @@ class ToDoLogic:
         self.streak_multiplier = 1.0
         self.streak_days = 0
         self.tasks_completed_today = 0
-        self.last_login_date = date.today()
-        self.last_streak_date = date.today() - timedelta(days=1)
+        self.last_login_date = self.clock.today()
+        self.last_streak_date = self.clock.today() - timedelta(days=1)
         self.paused_until = None
-        self.tasks = []
-        self.shop_items = []
-        self.last_weekly_check_date = date.today()
+        self.next_id = 1
+        self.tasks.clear()
+        self.shop_items = {}
+        self.last_weekly_check_date = self.clock.today()
         self.pending_weekly_message = None
-        self.mandatory_tasks = []
+        self.mandatory_tasks = MandatoryTaskStore(today=self.last_login_date)
         self.mandatory_tasks_completed_today = 0
 
-        self.save_data()
+        self.history.clear()
+        self.stats = RollingStats(clock=self.clock)
+        self.compact()
+        with self.events.batch():
+            for event in Event:
+                self.events.emit(event)
+            self._published = self._watched()
         return True, "Progress reset successfully!"
 
     # --- Data Persistence ---
-    def save_data(self):
-        """Saves all data to disk."""
-        data = {
+    def _state(self):
+        """Returns every scalar field in its serialized form."""
+        return {
             "tokens": self.tokens,
             "xp": self.xp,
             "level": self.level,
@@ -331,64 +561,160 @@ class ToDoLogic:
             "last_login_date": self.last_login_date.isoformat(),
             "last_streak_date": self.last_streak_date.isoformat(),
             "paused_until": self.paused_until.isoformat() if self.paused_until else None,
-            "tasks": self.tasks,
-            "shop_items": self.shop_items,
             "last_weekly_check_date": self.last_weekly_check_date.isoformat() if self.last_weekly_check_date else None,
             "pending_weekly_message": self.pending_weekly_message,
-            "mandatory_tasks": self.mandatory_tasks,
-            "mandatory_tasks_completed_today": self.mandatory_tasks_completed_today
+            "mandatory_tasks_completed_today": self.mandatory_tasks_completed_today,
+            "next_id": self.next_id
         }
 
-        with open("data.json", "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4)
+    def _apply_state(self, data):
+        """Restores the scalar fields written by _state()."""
+        self.tokens = data.get("tokens", 0)
+        self.xp = data.get("xp", 0)
+        self.level = data.get("level", 1)
+        self.xp_to_next_level = data.get("xp_to_next_level", 100)
+        self.streak_multiplier = data.get("streak_multiplier", 1.0)
+        self.streak_days = data.get("streak_days", 0)
+        self.tasks_completed_today = data.get("tasks_completed_today", 0)
+        self.last_login_date = date.fromisoformat(data.get("last_login_date", self.clock.today().isoformat()))
+        self.last_streak_date = date.fromisoformat(
+            data.get("last_streak_date", (self.clock.today() - timedelta(days=1)).isoformat())
+        )
+        self.paused_until = (
+            date.fromisoformat(data.get("paused_until"))
+            if data.get("paused_until") else None
+        )
+        self.last_weekly_check_date = (
+            date.fromisoformat(data.get("last_weekly_check_date"))
+            if data.get("last_weekly_check_date") else None
+        )
+        self.pending_weekly_message = data.get("pending_weekly_message", None)
+        self.mandatory_tasks_completed_today = data.get("mandatory_tasks_completed_today", 0)
+        self.next_id = data.get("next_id", 1)
+
+    def _record(self, op, **fields):
+        """Journals one change together with the scalar state after it, and publishes it."""
+        record = {"op": op, **fields, "s": self._state()}
+        stats = self.stats.take_pending()
+        if stats:
+            record["st"] = stats  # per-day statistics amounts added by this change
+            self.events.emit(Event.STATS_CHANGED)
+        self.storage.append(record)
+        if self.storage.needs_compaction():
+            self.compact()
+        self._publish(op, fields)
+
+    def _watched(self):
+        """Scalar values whose changes are published as events."""
+        return (
+            self.tokens,
+            (self.level, self.xp, self.xp_to_next_level),
+            (self.streak_days, self.streak_multiplier)
+        )
+
+    def _publish(self, op, fields):
+        """Turns a recorded change into events; every public change ends here exactly once."""
+        event = RECORD_EVENTS.get((op, fields.get("list")))
+        if event is not None:
+            if "ids" in fields:
+                ids = fields["ids"]
+            elif "id" in fields:
+                ids = [fields["id"]]
+            elif "item" in fields:
+                ids = [fields["item"]["id"]]
+            else:
+                ids = None
+            self.events.emit(event, ids)
+
+        watched = self._watched()
+        for event, before, after in zip(
+            (Event.WALLET_CHANGED, Event.LEVEL_CHANGED, Event.STREAK_CHANGED), self._published, watched
+        ):
+            if before != after:
+                self.events.emit(event)
+        self._published = watched
+        self.events.flush()
+
+    def _replay(self, record):
+        """Re-applies a journal record written by _record()."""
+        op = record["op"]
+        if op in ("add", "set"):
+            item = self._from_dict(record["list"])(record["item"])
+        if op in ("add", "set") and record["list"] == "shop_items":
+            self.shop_items[item.id] = item
+            self._sort_shop_items()
+        elif op in ("add", "set"):
+            getattr(self, record["list"]).add(item)
+        elif op == "del":
+            records = getattr(self, record["list"])
+            for item_id in record.get("ids", [record.get("id")]):
+                records.pop(item_id)
+        elif op == "escalate":
+            self._increase_task_priorities()
+        elif op == "deadline":
+            for task_id in record["ids"]:
+                self.tasks.promote(task_id, Priority.URGENT)
+
+        for day, amounts in record.get("st", {}).items():
+            self.stats.apply(date.fromisoformat(day), amounts)
+
+        self._apply_state(record["s"])
+
+    def _snapshot(self):
+        snapshot = {
+            **self._state(),
+            "stats": self.stats.to_dict(),
+            "shop_items": [item.to_dict() for item in self.shop_items.values()],
+            "mandatory_tasks": [task.to_dict() for task in self.mandatory_tasks.values()]
+        }
+        if not self.storage.keeps_tasks:
+            snapshot["tasks"] = [task.to_dict() for task in self.tasks.values()]
+        return snapshot
+
+    def save_data(self):
+        """Makes sure the current state is on disk (a journal append, not a full rewrite)."""
+        self._record("state")
+
+    def compact(self):
+        """Folds the journal into a fresh snapshot of all data."""
+        self.storage.write_snapshot(self._snapshot())
 
     def load_data(self):
-        """Loads data from disk or initializes defaults."""
-        try:
-            with open("data.json", "r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            self.tokens = data.get("tokens", 0)
-            self.xp = data.get("xp", 0)
-            self.level = data.get("level", 1)
-            self.xp_to_next_level = data.get("xp_to_next_level", 100)
-            self.streak_multiplier = data.get("streak_multiplier", 1.0)
-            self.streak_days = data.get("streak_days", 0)
-            self.tasks_completed_today = data.get("tasks_completed_today", 0)
-            self.last_login_date = date.fromisoformat(data.get("last_login_date", date.today().isoformat()))
-            self.last_streak_date = date.fromisoformat(
-                data.get("last_streak_date", (date.today() - timedelta(days=1)).isoformat())
+        """Loads the snapshot and replays the journal, or initializes defaults."""
+        data, records = self.storage.load()
+        self.history = self.storage.history()
+        self.stats = RollingStats(data.get("stats") if data else None, self.clock)
+
+        if data is not None:
+            self._apply_state(data)
+            self.tasks = self.storage.task_store(self._index(data.get("tasks", []), "tasks").values())
+            self.shop_items = self._index(data.get("shop_items", []), "shop_items")
+            self.mandatory_tasks = MandatoryTaskStore(
+                self._index(data.get("mandatory_tasks", []), "mandatory_tasks").values(), today=self.last_login_date
             )
-            self.paused_until = (
-                date.fromisoformat(data.get("paused_until"))
-                if data.get("paused_until") else None
-            )
-            self.tasks = data.get("tasks", [])
-            self.shop_items = data.get("shop_items", [])
-            self.last_weekly_check_date = (
-                date.fromisoformat(data.get("last_weekly_check_date"))
-                if data.get("last_weekly_check_date") else None
-            )
-            self.pending_weekly_message = data.get("pending_weekly_message", None)
-            self.mandatory_tasks = data.get("mandatory_tasks", [])
-            self.mandatory_tasks_completed_today = data.get("mandatory_tasks_completed_today", 0)
-
-        except (FileNotFoundError, json.JSONDecodeError):
+        else:
             self.tokens, self.xp, self.level = 0, 0, 1
             self.xp_to_next_level = 100
             self.streak_multiplier = 1.0
             self.streak_days = 0
             self.tasks_completed_today = 0
-            self.last_login_date = date.today()
-            self.last_streak_date = date.today() - timedelta(days=1)
+            self.last_login_date = self.clock.today()
+            self.last_streak_date = self.clock.today() - timedelta(days=1)
             self.paused_until = None
-            self.tasks = []
-            self.shop_items = []
-            self.last_weekly_check_date = date.today()
+            self.next_id = 1
+            self.tasks = self.storage.task_store()
+            self.shop_items = {}
+            self.last_weekly_check_date = self.clock.today()
             self.pending_weekly_message = None
-            self.mandatory_tasks = []
+            self.mandatory_tasks = MandatoryTaskStore(today=self.last_login_date)
             self.mandatory_tasks_completed_today = 0
 
-        self._sort_tasks()
         self._sort_shop_items()
-        self._sort_mandatory_tasks()
\ No newline at end of file
+
+        for record in records:
+            self._replay(record)
+        # catch the schedule up with the journal, anything missed was reported back then
+        self.mandatory_tasks.advance(self.last_login_date)
+
+        self._published = self._watched()
+
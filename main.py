@@ -1,6 +1,11 @@
-from UI.main_window import MainWindow
+import sys
 
 if __name__ == "__main__":
+    # any arguments mean the command line front end, which never loads Tk
+    if len(sys.argv) > 1:
+        from cli import main
+        sys.exit(main())
+
+    from UI.main_window import MainWindow
     app = MainWindow()
     app.mainloop()
-    
\ No newline at end of file
@@ -0,0 +1,120 @@
+"""
+Several profiles (users) side by side, each in its own folder:
+
+    profiles/<name>/data.json, data.journal, data.history    (or data.db with SQLite)
+
+A profile's ToDoLogic is only loaded the first time it is asked for, and at
+most `capacity` of them stay in memory: asking for one more evicts the least
+recently used, which is flushed to disk and closed first. Every change is
+already journaled when it happens, so eviction never loses anything and a
+process can serve far more profiles than it keeps loaded.
+
+The manager also keeps the cross-profile leaderboards (see leaderboards.py)
+up to date from every profile it loads. They are saved when it closes, and at
+most every SAVE_INTERVAL seconds while profiles are evicted.
+"""
+import os
+import re
+import shutil
+from collections import OrderedDict
+
+from leaderboards import SAVE_INTERVAL, Leaderboards
+from logic import ToDoLogic
+from storage import JournalStorage, SqliteStorage, WriteBehindStorage
+
+# letters, digits, "-" and "_", so a name is always a plain folder name
+NAME_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+class ProfileManager:
+    def __init__(self, root="profiles", capacity=32, backend="json", write_behind=False, clock=None,
+                 factory=ToDoLogic):
+        """factory(storage, clock) loads a profile, e.g. profiling.profiled_logic to time it."""
+        if backend not in ("json", "sqlite"):
+            raise ValueError(f"Unknown backend: {backend!r}")
+        self.root = root
+        self.capacity = capacity
+        self.backend = backend
+        self.write_behind = write_behind
+        self.clock = clock
+        self.factory = factory
+        self.loaded = OrderedDict()     # name -> ToDoLogic, least recently used first
+        self.leaderboards = Leaderboards(os.path.join(root, "leaderboards.json"), clock)
+
+    def folder(self, name):
+        if not NAME_PATTERN.fullmatch(name):
+            raise ValueError(f"Invalid profile name: {name!r}")
+        return os.path.join(self.root, name)
+
+    def storage(self, name):
+        """A new storage backend for the profile, creating its folder."""
+        folder = self.folder(name)
+        os.makedirs(folder, exist_ok=True)
+        if self.backend == "sqlite":
+            return SqliteStorage(os.path.join(folder, "data.db"))
+        if self.write_behind:
+            return WriteBehindStorage(os.path.join(folder, "data.json"))
+        return JournalStorage(os.path.join(folder, "data.json"))
+
+    def get(self, name):
+        """The profile's ToDoLogic, loading it (or starting a new profile) if needed."""
+        logic = self.loaded.get(name)
+        if logic is not None:
+            self.loaded.move_to_end(name)
+            return logic
+
+        logic = self.factory(self.storage(name), self.clock)
+        self.loaded[name] = logic
+        self.leaderboards.watch(name, logic)
+        while len(self.loaded) > self.capacity:
+            self.evict(next(iter(self.loaded)))
+        return logic
+
+    __getitem__ = get
+
+    def evict(self, name):
+        """Flushes a loaded profile to disk and drops it from memory."""
+        logic = self.loaded.pop(name, None)
+        if logic is not None:
+            logic.storage.flush()
+            logic.storage.close()
+            # not every time: under churn rewriting the whole file would be the slowest part of a request
+            self.leaderboards.save(SAVE_INTERVAL)
+
+    def exists(self, name):
+        return name in self.loaded or os.path.isdir(self.folder(name))
+
+    def names(self):
+        """Every profile on disk, loaded or not."""
+        try:
+            return sorted(
+                entry.name for entry in os.scandir(self.root)
+                if entry.is_dir() and NAME_PATTERN.fullmatch(entry.name)
+            )
+        except FileNotFoundError:
+            return []
+
+    def delete(self, name):
+        """Removes a profile and all its files."""
+        self.evict(name)
+        shutil.rmtree(self.folder(name), ignore_errors=True)
+        self.leaderboards.remove(name)
+        self.leaderboards.save()
+
+    def close(self):
+        """Flushes and drops every loaded profile."""
+        for name in list(self.loaded):
+            self.evict(name)
+        self.leaderboards.save()
+
+    def __contains__(self, name):
+        return name in self.loaded
+
+    def __len__(self):
+        return len(self.loaded)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,200 @@
+"""
+Opt-in instrumentation: call counts and latency histograms per operation, to
+tell whether slowness comes from the logic, the storage (serialization, disk)
+or the widgets.
+
+Nothing is measured unless asked for. Set CODEX_PROFILE to a file path (for
+the window or the command line) or pass --profile to the command line. A
+path ending in .json gets the histograms, any other path gets cProfile stats
+of the whole session (open them with `python -m pstats <path>`).
+
+    CODEX_PROFILE=profile.json python main.py
+    python main.py --profile profile.prof list
+
+Instrumenting wraps the methods on one object (not its class), so other
+ToDoLogic instances, e.g. simulations, keep running at full speed.
+"""
+import cProfile
+import json
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+from bench import format_seconds
+from logic import ToDoLogic
+from storage import default_storage
+
+# histogram bucket upper bounds in seconds: 1us, 2us, 4us ... about 2 minutes
+BUCKET_BOUNDS = tuple(1e-6 * 2 ** k for k in range(28))
+
+# what gets timed on each layer
+STORAGE_METHODS = ("load", "append", "write_snapshot", "flush", "close")
+VIEW_METHODS = ("apply_changes", "refresh_ui", "refresh_tokens", "refresh_level", "refresh_streak")
+LIST_METHODS = ("refresh", "fetch")
+
+
+class LatencyHistogram:
+    """Call count, total/min/max and a log2 histogram of durations."""
+
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)   # the last one is for anything slower
+
+    def record(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.buckets[bisect_left(BUCKET_BOUNDS, seconds)] += 1
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of calls (never above max)."""
+        if not self.count:
+            return 0.0
+        wanted = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= wanted:
+                return min(BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else self.max, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+            # {upper bound in seconds: calls}, only the buckets that were hit
+            "buckets": {
+                (f"{BUCKET_BOUNDS[index]:.6g}" if index < len(BUCKET_BOUNDS) else "inf"): count
+                for index, count in enumerate(self.buckets) if count
+            },
+        }
+
+
+class Profiler:
+    """Collects a LatencyHistogram per operation name, and optionally cProfile stats."""
+
+    def __init__(self, cprofile=False):
+        self.histograms = {}
+        self.cprofile = cProfile.Profile() if cprofile else None
+        if self.cprofile:
+            self.cprofile.enable()
+
+    @contextmanager
+    def timed(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name, seconds):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        histogram.record(seconds)
+
+    def wrap(self, name, function):
+        """`function`, recording every call under `name`."""
+        @wraps(function)
+        def timed_call(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - started)
+        return timed_call
+
+    def instrument(self, obj, names=None, prefix=None):
+        """
+        Times the given methods of one object (by default every public method of
+        its class), recorded as "<prefix>.<method>", prefix defaulting to the class name.
+        """
+        prefix = prefix or type(obj).__name__
+        if names is None:
+            names = [
+                name for name in dir(type(obj))
+                if not name.startswith("_") and callable(getattr(type(obj), name))
+            ]
+        for name in names:
+            method = getattr(obj, name, None)
+            if callable(method):
+                setattr(obj, name, self.wrap(f"{prefix}.{name}", method))
+        return obj
+
+    def to_dict(self):
+        return {name: histogram.to_dict() for name, histogram in sorted(self.histograms.items())}
+
+    def report(self):
+        return format_report(self.to_dict())
+
+    def dump(self, path):
+        """Writes the histograms (.json) or the cProfile stats (any other extension)."""
+        if path.endswith(".json"):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f, indent=2)
+        elif self.cprofile:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(path)
+        else:
+            raise ValueError("cProfile stats need a Profiler(cprofile=True).")
+
+
+def format_report(histograms):
+    """Text table of to_dict() output (also what a .json dump holds), slowest total first."""
+    if not histograms:
+        return "Nothing was timed."
+    rows = sorted(histograms.items(), key=lambda entry: entry[1]["total"], reverse=True)
+    width = max(len(name) for name, _ in rows)
+    lines = [f"{'operation':<{width}} {'calls':>7} {'total':>9} {'mean':>9} {'p50':>9} {'p99':>9} {'max':>9}"]
+    for name, row in rows:
+        lines.append(f"{name:<{width}} {row['count']:>7} " + " ".join(
+            f"{format_seconds(row[column]):>9}" for column in ("total", "mean", "p50", "p99", "max")
+        ))
+    return "\n".join(lines)
+
+
+def from_environment():
+    """(Profiler, dump path) when CODEX_PROFILE is set, else (None, None)."""
+    path = os.environ.get("CODEX_PROFILE")
+    if not path:
+        return None, None
+    return Profiler(cprofile=not path.endswith(".json")), path
+
+
+def profiled_logic(profiler, storage=None, clock=None):
+    """A ToDoLogic whose public methods and storage are timed, loading included."""
+    storage = storage or default_storage()
+    profiler.instrument(storage, STORAGE_METHODS, prefix="storage")
+    with profiler.timed("ToDoLogic.__init__"):
+        logic = ToDoLogic(storage, clock)
+    profiler.instrument(logic.events, ["flush"], prefix="events")
+    return profiler.instrument(logic)
+
+
+def instrument_view(profiler, view, list_attribute=None):
+    """Times a view's redraw methods and, if it has one, its virtual list's refresh and row fetching."""
+    name = type(view).__name__
+    profiler.instrument(view, [method for method in VIEW_METHODS if hasattr(view, method)], prefix=name)
+    if list_attribute:
+        profiler.instrument(getattr(view, list_attribute), LIST_METHODS, prefix=f"{name}.{list_attribute}")
+
+
+if __name__ == "__main__":
+    # python profiling.py profile.json: shows a dump written by the window or the command line
+    import sys
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        print(format_report(json.load(f)))
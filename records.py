@@ -0,0 +1,164 @@
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from enum import IntEnum
+import recurrence
+
+
+class LabeledEnum(IntEnum):
+    """Small integer enum that reads and writes the labels used in data.json and the UI."""
+
+    def __new__(cls, value, label):
+        member = int.__new__(cls, value)
+        member._value_ = value
+        member.label = label
+        return member
+
+    @classmethod
+    def from_label(cls, label, default=None):
+        # label -> member, built on first use (loading and importing call this for every task)
+        by_label = cls.__dict__.get("_by_label")
+        if by_label is None:
+            by_label = cls._by_label = {member.label: member for member in cls}
+        member = by_label.get(label)
+        if member is not None:
+            return member
+        if default is None:
+            raise ValueError(f"Unknown {cls.__name__.lower()}: {label!r}")
+        return default
+
+    @classmethod
+    def coerce(cls, value):
+        """Accepts either a member/int or its label, raises ValueError for anything else (bools, floats)."""
+        if isinstance(value, str):
+            return cls.from_label(value)
+        if isinstance(value, int) and not isinstance(value, bool):
+            return cls(value)
+        raise ValueError(f"Unknown {cls.__name__.lower()}: {value!r}")
+
+    @classmethod
+    def labels(cls):
+        return [member.label for member in cls]
+
+
+class Difficulty(LabeledEnum):
+    VERY_EASY = 0, "Very Easy"
+    EASY = 1, "Easy"
+    MEDIUM = 2, "Medium"
+    HARD = 3, "Hard"
+    VERY_HARD = 4, "Very Hard"
+
+
+class Priority(LabeledEnum):
+    # higher value means higher priority, tasks are shown highest first
+    IRRELEVANT = 0, "Irrelevant"
+    LOW = 1, "Low"
+    MEDIUM = 2, "Medium"
+    HIGH = 3, "High"
+    URGENT = 4, "Urgent"
+
+
+def parse_due(value):
+    """
+    Accepts a datetime, a date (due at the end of that day) or the ISO text of either.
+    A UTC offset is converted to local time: deadlines are naive, like the clock.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return _local(value)
+    if isinstance(value, date):
+        return datetime.combine(value, time(23, 59))
+    if not isinstance(value, str):
+        raise ValueError(f"Invalid due date {value!r}, use YYYY-MM-DD or YYYY-MM-DD HH:MM.")
+    try:
+        due = datetime.fromisoformat(value.strip())
+    except ValueError:
+        raise ValueError(f"Invalid due date {value!r}, use YYYY-MM-DD or YYYY-MM-DD HH:MM.") from None
+    if len(value.strip()) == 10:
+        return datetime.combine(due.date(), time(23, 59))
+    return _local(due)
+
+
+def _local(moment):
+    return moment if moment.tzinfo is None else moment.astimezone().replace(tzinfo=None)
+
+
+@dataclass(slots=True)
+class Task:
+    id: int
+    name: str
+    difficulty: Difficulty
+    priority: Priority
+    due: datetime | None = None     # optional deadline, the task turns Urgent once it passes
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data['id'],
+            data['name'],
+            Difficulty.from_label(data['difficulty']),
+            # unknown priorities from old saves sort last, like they used to
+            Priority.from_label(data.get('priority'), Priority.IRRELEVANT),
+            # parse_due, so a deadline saved with an offset before they were converted still loads naive
+            parse_due(data.get('due'))
+        )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "difficulty": self.difficulty.label,
+            "priority": self.priority.label,
+            "due": self.due.isoformat(timespec="minutes") if self.due else None
+        }
+
+
+@dataclass(slots=True)
+class MandatoryTask:
+    id: int
+    name: str
+    rule: object    # when it is due, see recurrence.py
+    completed_on: date | None = None    # last day it was completed, nothing to reset daily
+
+    @classmethod
+    def from_dict(cls, data, saved_on):
+        """saved_on is the save's last login day, older saves need it to date their completion flag."""
+        if 'rule' in data:
+            rule = recurrence.from_dict(data['rule'])
+        else:
+            # older saves only had a single weekday
+            rule = recurrence.weekly(data.get('activation_day', 0))
+
+        if data.get('completed_on'):
+            completed_on = date.fromisoformat(data['completed_on'])
+        elif data.get('completed_today'):
+            # older saves only kept a flag, set on the task's last activation day on or before that login
+            completed_on = saved_on - timedelta(days=(saved_on.weekday() - data.get('activation_day', 0)) % 7)
+        else:
+            completed_on = None
+        return cls(data['id'], data['name'], rule, completed_on)
+
+    def to_dict(self):
+        data = {
+            "id": self.id,
+            "name": self.name,
+            "rule": self.rule.to_dict(),
+            "completed_on": self.completed_on.isoformat() if self.completed_on else None
+        }
+        if isinstance(self.rule, recurrence.Weekdays) and len(self.rule.days) == 1:
+            data["activation_day"] = self.rule.days[0]  # still readable by older versions
+        return data
+
+
+@dataclass(slots=True)
+class ShopItem:
+    id: int
+    name: str
+    price: int
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['id'], data['name'], data.get('price', 0))
+
+    def to_dict(self):
+        return {"id": self.id, "name": self.name, "price": self.price}
@@ -0,0 +1,184 @@
+"""
+Recurrence rules for mandatory tasks. Every rule answers the same three
+questions in closed form, without walking the calendar day by day:
+
+    occurs_on(day)          is the task due on this day?
+    next_on_or_after(day)   first due day >= day
+    count_between(a, b)     number of due days in a..b (inclusive)
+
+Rules are written as short strings in the UI and on the command line:
+
+    monday / mon,wed,fri / daily    on those weekdays
+    every 3 days                    every N days, counted from the day it was added
+    monthly 15                      on that day of every month (or the month's last day)
+"""
+from calendar import monthrange
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+@dataclass(frozen=True, slots=True)
+class Weekdays:
+    days: tuple     # weekdays, Monday is 0
+
+    def occurs_on(self, day):
+        return day.weekday() in self.days
+
+    def next_on_or_after(self, day):
+        return day + timedelta(days=min((weekday - day.weekday()) % 7 for weekday in self.days))
+
+    def count_between(self, start, end):
+        if end < start:
+            return 0
+        total = (end - start).days + 1
+        full_weeks, rest = divmod(total, 7)
+        # the leftover days are the first `rest` weekdays starting at start's
+        extra = sum(1 for weekday in self.days if (weekday - start.weekday()) % 7 < rest)
+        return full_weeks * len(self.days) + extra
+
+    def describe(self):
+        if len(self.days) == 7:
+            return "Every day"
+        return ", ".join(DAY_NAMES[weekday] for weekday in self.days)
+
+    def to_dict(self):
+        return {"weekdays": list(self.days)}
+
+
+@dataclass(frozen=True, slots=True)
+class EveryNDays:
+    interval: int
+    start: date     # first due day, every other one is a multiple of interval away
+
+    def occurs_on(self, day):
+        return day >= self.start and (day - self.start).days % self.interval == 0
+
+    def next_on_or_after(self, day):
+        if day <= self.start:
+            return self.start
+        steps = -(-(day - self.start).days // self.interval)
+        return self.start + timedelta(days=steps * self.interval)
+
+    def count_between(self, start, end):
+        first = self.next_on_or_after(start)
+        if first > end:
+            return 0
+        return (end - first).days // self.interval + 1
+
+    def describe(self):
+        return "Every day" if self.interval == 1 else f"Every {self.interval} days"
+
+    def to_dict(self):
+        return {"every": self.interval, "start": self.start.isoformat()}
+
+
+@dataclass(frozen=True, slots=True)
+class MonthlyOn:
+    day: int    # 1-31, clamped to the last day of shorter months
+
+    def _in_month(self, year, month):
+        return date(year, month, min(self.day, monthrange(year, month)[1]))
+
+    def occurs_on(self, day):
+        return day == self._in_month(day.year, day.month)
+
+    def next_on_or_after(self, day):
+        due = self._in_month(day.year, day.month)
+        if due >= day:
+            return due
+        year, month = divmod(day.year * 12 + day.month, 12)    # the following month
+        return self._in_month(year, month + 1)
+
+    def count_between(self, start, end):
+        if end < start:
+            return 0
+        # one per month in the range, minus the first/last month if it falls outside
+        months = (end.year * 12 + end.month) - (start.year * 12 + start.month) + 1
+        if self._in_month(start.year, start.month) < start:
+            months -= 1
+        if self._in_month(end.year, end.month) > end:
+            months -= 1
+        return months
+
+    def describe(self):
+        return f"Monthly on day {self.day}"
+
+    def to_dict(self):
+        return {"monthly": self.day}
+
+
+RULES = (Weekdays, EveryNDays, MonthlyOn)
+
+
+def weekly(weekday):
+    """The classic mandatory task: once a week on one weekday."""
+    return Weekdays((weekday,))
+
+
+def parse(text, today):
+    """Builds a rule from its short text form, raises ValueError if it can't; "every N days" starts today."""
+    words = text.strip().lower().replace(",", " ").split()
+    if not words:
+        raise ValueError("Recurrence cannot be empty.")
+
+    if words == ["daily"]:
+        return Weekdays(tuple(range(7)))
+
+    if words[0] == "every" and len(words) in (2, 3):
+        if len(words) == 2:
+            words.insert(1, "1")
+        if words[2] not in ("day", "days") or not words[1].isdigit() or int(words[1]) < 1:
+            raise ValueError(f"Unknown recurrence: {text!r}")
+        return EveryNDays(int(words[1]), today)
+
+    if words[0] == "monthly" and len(words) == 2:
+        if not words[1].isdigit() or not 1 <= int(words[1]) <= 31:
+            raise ValueError("Day of month must be between 1 and 31.")
+        return MonthlyOn(int(words[1]))
+
+    days = []
+    for word in words:
+        matches = [index for index, name in enumerate(DAY_NAMES) if name.lower().startswith(word)]
+        if len(word) < 3 or len(matches) != 1:
+            raise ValueError(f"Unknown recurrence: {text!r}")
+        days.append(matches[0])
+    return Weekdays(tuple(sorted(set(days))))
+
+
+def coerce(value, today):
+    """Accepts a rule, a weekday number (the old single-day tasks) or the text form."""
+    if isinstance(value, RULES):
+        return value
+    if isinstance(value, int) and not isinstance(value, bool):
+        if not 0 <= value <= 6:
+            raise ValueError("Weekday must be between 0 (Monday) and 6 (Sunday).")
+        return weekly(value)
+    if isinstance(value, str):
+        return parse(value, today)
+    raise ValueError(f"Unknown recurrence: {value!r}")
+
+
+def _whole(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def from_dict(data):
+    """Rebuilds a rule written by to_dict(), raises ValueError for anything else (imports pass them in)."""
+    try:
+        if "every" in data:
+            rule = EveryNDays(data["every"], date.fromisoformat(data["start"]))
+            valid = _whole(rule.interval) and rule.interval >= 1
+        elif "monthly" in data:
+            rule = MonthlyOn(data["monthly"])
+            valid = _whole(rule.day) and 1 <= rule.day <= 31
+        else:
+            days = list(data["weekdays"])
+            valid = days and all(_whole(day) and 0 <= day <= 6 for day in days)
+            rule = Weekdays(tuple(sorted(set(days)))) if valid else None
+    except (KeyError, TypeError, ValueError):
+        valid = False
+    if not valid:
+        raise ValueError(f"Unknown recurrence: {data!r}")
+    return rule
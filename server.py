@@ -0,0 +1,402 @@
+"""
+Local HTTP/JSON API over ToDoLogic, for web or other front ends. Standard
+library only (asyncio streams), HTTP/1.1 with keep-alive.
+
+    python server.py --port 8765
+    curl -X POST localhost:8765/tasks -d '{"name": "Write report", "priority": "High"}'
+
+Concurrency: requests are read and parsed concurrently, but every call into
+ToDoLogic runs on the event loop thread, one whole operation at a time (the
+loop is the single writer, nothing in a handler awaits half way through a
+change), so concurrent requests can't interleave updates to tokens or XP.
+Persistence is batched by WriteBehindStorage: a burst of changes reaches the
+disk once, from a background thread, without stalling the loop.
+
+Endpoints (bodies and responses are JSON; responses carry "ok" and "message",
+and POSTs that create something also the new "id"):
+
+    GET    /status                         level, XP, tokens, streak
+    GET    /stats                          last 7/30/365 days and all time
+    GET    /tasks?offset=&limit=           regular tasks in priority order
+    POST   /tasks                          {"name", "difficulty", "priority", "due"}
+    POST   /tasks/complete                 {"ids": [...]}
+    DELETE /tasks/<id>
+    GET    /mandatory-tasks
+    POST   /mandatory-tasks                {"name", "rule"} (e.g. "mon,wed,fri", "every 3 days")
+    POST   /mandatory-tasks/<id>/complete
+    DELETE /mandatory-tasks/<id>
+    GET    /shop?offset=&limit=&max_price=
+    POST   /shop                           {"name", "price"}
+    POST   /shop/<id>/buy
+    POST   /pause
+    POST   /checks                         weekly + daily checks and deadlines, like daily-check
+
+With --profiles FOLDER they are served per profile, as /profiles/<name>/tasks
+and so on (GET /profiles lists them), loaded lazily by a ProfileManager;
+GET /leaderboards?limit= ranks them by level, streak and tokens earned this week.
+"""
+import argparse
+import asyncio
+import json
+import re
+import signal
+import sys
+from urllib.parse import parse_qs, urlsplit
+
+from logic import ToDoLogic
+from profiles import ProfileManager
+from stats import WINDOWS
+from storage import default_storage
+
+REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 500: "Internal Server Error"
+}
+
+# requests with a bigger body are refused
+MAX_BODY = 1 << 20
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _result(success, message, **extra):
+    return {"ok": bool(success), "message": message, **extra}
+
+
+def _int(query, name, default=None, minimum=None):
+    try:
+        value = int(query[name][0]) if name in query else default
+    except ValueError:
+        raise HttpError(400, f"{name} must be a whole number.")
+    if minimum is not None and value is not None and value < minimum:
+        raise HttpError(400, f"{name} must be at least {minimum}.")
+    return value
+
+
+def _id(value):
+    # JSON true/false are ints in Python, but not task ids
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _field(body, name, default=None):
+    if not isinstance(body, dict):
+        raise HttpError(400, "Expected a JSON object.")
+    return body.get(name, default)
+
+
+# --- handlers: (logic, body, query, *path ids) -> response dict ---
+
+def get_status(logic, body, query):
+    return _result(True, "", status={
+        "level": logic.level,
+        "xp": logic.xp,
+        "xp_to_next_level": logic.xp_to_next_level,
+        "tokens": logic.tokens,
+        "streak_days": logic.streak_days,
+        "streak_multiplier": logic.streak_multiplier,
+        "paused_until": logic.paused_until.isoformat() if logic.paused_until else None,
+    })
+
+
+def get_stats(logic, body, query):
+    windows = {f"last_{days}_days": logic.stats.window(days) for days in WINDOWS}
+    return _result(True, "", stats={**windows, "all_time": logic.stats.window()})
+
+
+def get_tasks(logic, body, query):
+    tasks = logic.get_tasks_page(_int(query, "offset", 0, minimum=0), _int(query, "limit", 50, minimum=0))
+    return _result(True, "", total=logic.count_tasks(), tasks=[task.to_dict() for task in tasks])
+
+
+def _created(logic, add, *args):
+    """Result of an add_* call, with the id the new record got."""
+    new_id = logic.next_id
+    success, message = add(*args)
+    return _result(success, message, **({"id": new_id} if success else {}))
+
+
+def add_task(logic, body, query):
+    return _created(
+        logic, logic.add_task, _field(body, "name", ""), _field(body, "difficulty", "Easy"),
+        _field(body, "priority", "Low"), _field(body, "due")
+    )
+
+
+def complete_tasks(logic, body, query):
+    ids = _field(body, "ids", [])
+    if not isinstance(ids, list) or not all(map(_id, ids)):
+        raise HttpError(400, "ids must be a list of task ids.")
+    return _result(*logic.complete_tasks(ids))
+
+
+def delete_task(logic, body, query, task_id):
+    return _result(*logic.delete_task(task_id))
+
+
+def get_mandatory_tasks(logic, body, query):
+    today = logic.clock.today()
+    return _result(True, "", tasks=[
+        {**task.to_dict(), "due_today": logic.mandatory_tasks.is_due(task, today), "repeat": task.rule.describe()}
+        for task in logic.mandatory_tasks.values()
+    ])
+
+
+def add_mandatory_task(logic, body, query):
+    return _created(logic, logic.add_mandatory_task, _field(body, "name", ""), _field(body, "rule", ""))
+
+
+def complete_mandatory_task(logic, body, query, task_id):
+    task = logic.mandatory_tasks.get(task_id)
+    if task is None:
+        return _result(False, "Task not found.")
+    completed_before = task.completed_on
+    message = logic.complete_mandatory_task(task_id)
+    # it answers with a message either way, completed_on tells whether it worked
+    return _result(task.completed_on != completed_before, message)
+
+
+def delete_mandatory_task(logic, body, query, task_id):
+    return _result(*logic.delete_mandatory_task(task_id))
+
+
+def get_shop(logic, body, query):
+    items = logic.get_shop_items_page(
+        _int(query, "offset", 0, minimum=0), _int(query, "limit", 50, minimum=0), _int(query, "max_price")
+    )
+    return _result(True, "", items=[item.to_dict() for item in items])
+
+
+def add_shop_item(logic, body, query):
+    return _created(logic, logic.add_shop_item, _field(body, "name", ""), str(_field(body, "price", "")))
+
+
+def buy_item(logic, body, query, item_id):
+    return _result(*logic.buy_item(item_id))
+
+
+def pause(logic, body, query):
+    return _result(*logic.pause_day())
+
+
+def run_checks(logic, body, query):
+    """Same startup checks as the window: weekly updates first, then the daily ones and deadlines."""
+    logic.check_weekly_updates()
+    messages = []
+    weekly_message = logic.get_and_clear_pending_message()
+    if weekly_message:
+        messages.append(weekly_message)
+    messages += [f"{title}: {message}" for _, title, message in logic.check_daily_status()]
+    messages += [f"Deadline passed: {task.name} is now Urgent." for task in logic.check_deadlines()]
+    return _result(True, "\n".join(messages) or "Nothing to report.", messages=messages)
+
+
+# (method, path pattern, handler); (\d+) groups are passed to the handler as ints
+ROUTES = [
+    ("GET", r"/status", get_status),
+    ("GET", r"/stats", get_stats),
+    ("GET", r"/tasks", get_tasks),
+    ("POST", r"/tasks", add_task),
+    ("POST", r"/tasks/complete", complete_tasks),
+    ("DELETE", r"/tasks/(\d+)", delete_task),
+    ("GET", r"/mandatory-tasks", get_mandatory_tasks),
+    ("POST", r"/mandatory-tasks", add_mandatory_task),
+    ("POST", r"/mandatory-tasks/(\d+)/complete", complete_mandatory_task),
+    ("DELETE", r"/mandatory-tasks/(\d+)", delete_mandatory_task),
+    ("GET", r"/shop", get_shop),
+    ("POST", r"/shop", add_shop_item),
+    ("POST", r"/shop/(\d+)/buy", buy_item),
+    ("POST", r"/pause", pause),
+    ("POST", r"/checks", run_checks),
+]
+ROUTES = [(method, re.compile(pattern + r"/?"), handler) for method, pattern, handler in ROUTES]
+
+
+# with a ProfileManager every endpoint above lives under /profiles/<name>
+PROFILE_PATH = re.compile(r"/profiles/([^/]+)(/.*)")
+
+
+class ApiServer:
+    """
+    Serves one ToDoLogic, or every profile of a ProfileManager, over HTTP;
+    see the module docstring for the concurrency model.
+    """
+
+    def __init__(self, logic=None, profiles=None):
+        self.logic = logic
+        self.profiles = profiles
+        self.server = None
+        self.requests = 0
+
+    def _profile(self, method, path):
+        """(ToDoLogic, path inside the profile) for a /profiles/<name>/... path."""
+        match = PROFILE_PATH.fullmatch(path)
+        if not match:
+            raise HttpError(404, f"No such endpoint: {path}")
+        name, path = match.groups()
+        try:
+            # reading a profile that doesn't exist shouldn't create it
+            if method == "GET" and not self.profiles.exists(name):
+                raise HttpError(404, f"No such profile: {name}")
+            return self.profiles.get(name), path
+        except ValueError as e:
+            raise HttpError(400, str(e))
+
+    def leaderboards(self, limit):
+        boards = self.profiles.leaderboards
+        return _result(True, "", leaderboards={
+            "level": [{"profile": name, "level": level, "xp": xp} for name, (level, xp) in boards.top_level(limit)],
+            "streak": [{"profile": name, "streak_days": days} for name, days in boards.top_streak(limit)],
+            "weekly_tokens": [
+                {"profile": name, "tokens": tokens} for name, tokens in boards.top_weekly_tokens(limit)
+            ],
+        })
+
+    def dispatch(self, method, target, body):
+        """(status, response dict) for one request. Runs on the loop thread, never awaits."""
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        path, logic = url.path, self.logic
+        try:
+            if self.profiles is not None:
+                if path.rstrip("/") == "/profiles" and method == "GET":
+                    return 200, _result(True, "", profiles=self.profiles.names())
+                if path.rstrip("/") == "/leaderboards" and method == "GET":
+                    return 200, self.leaderboards(_int(query, "limit", 10, minimum=0))
+                logic, path = self._profile(method, path)
+        except HttpError as e:
+            return e.status, _result(False, str(e))
+
+        allowed = False
+        for route_method, pattern, handler in ROUTES:
+            match = pattern.fullmatch(path)
+            if not match:
+                continue
+            allowed = True
+            if route_method != method:
+                continue
+            try:
+                response = handler(logic, body, query, *map(int, match.groups()))
+            except HttpError as e:
+                return e.status, _result(False, str(e))
+            return (200 if response["ok"] else 400), response
+        if allowed:
+            return 405, _result(False, f"{method} is not allowed on {path}.")
+        return 404, _result(False, f"No such endpoint: {path}")
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self.read_request(reader)
+                except HttpError as e:
+                    # the body wasn't read, so the connection can't be reused
+                    await self.respond(writer, e.status, _result(False, str(e)), keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                try:
+                    status, response = self.dispatch(method, target, body)
+                except Exception as e:  # a bug in a handler shouldn't take the server down
+                    status, response = 500, _result(False, f"{type(e).__name__}: {e}")
+                self.requests += 1
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self.respond(writer, status, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, response, keep_alive):
+        payload = json.dumps(response).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + payload
+        )
+        await writer.drain()
+
+    async def read_request(self, reader):
+        """
+        (method, target, headers, parsed JSON body or None), or None once the client is gone.
+        Raises HttpError for a Content-Length that can't be read.
+        """
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        try:
+            method, target, _ = line.decode("latin-1").split()
+        except ValueError:
+            return None
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", 0) or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise HttpError(400, "Content-Length must be a whole number of bytes.")
+        if length > MAX_BODY:
+            raise HttpError(413, f"Request bodies are limited to {MAX_BODY} bytes.")
+        body = None
+        if length:
+            raw = await reader.readexactly(length)
+            try:
+                body = json.loads(raw)
+            except ValueError:
+                body = raw  # handlers reject anything that isn't an object
+        return method.upper(), target, headers, body
+
+    async def start(self, host="127.0.0.1", port=8765):
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server
+
+    async def serve_forever(self, host="127.0.0.1", port=8765):
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Codex as a local HTTP/JSON API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--profiles", metavar="FOLDER", help="serve every profile in FOLDER under /profiles/<name>")
+    parser.add_argument("--loaded", type=int, default=32, help="most profiles kept in memory at once")
+    args = parser.parse_args(argv)
+
+    if args.profiles:
+        profiles = ProfileManager(args.profiles, args.loaded, write_behind=True)
+        api, close = ApiServer(profiles=profiles), profiles.close
+    else:
+        logic = ToDoLogic(default_storage(write_behind=True))
+        api, close = ApiServer(logic), logic.storage.close
+    print(f"Serving on http://{args.host}:{args.port}")
+    # kill/terminate should save too, not only ctrl+c
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        asyncio.run(api.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        close()  # writes whatever the background savers still hold
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
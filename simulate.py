@@ -0,0 +1,146 @@
+"""
+Fast-forwards ToDoLogic through simulated days to see how the penalty, streak
+and escalation rules play out over years of use. Runs entirely in memory
+(MemoryStorage, SimulatedClock), so ten years take a few seconds and nothing
+touches data.json.
+
+    python simulate.py --days 3650 --active 0.8 --add 3 --complete 3
+"""
+import argparse
+import math
+import random
+import sys
+import time
+from dataclasses import dataclass
+from datetime import date
+
+from clock import SimulatedClock
+from logic import ToDoLogic, PAUSE_COST, TASKS_FOR_STREAK
+from records import Difficulty, Priority
+from storage import MemoryStorage
+
+
+@dataclass
+class UserModel:
+    """Scripted user: what they do on each simulated day."""
+    active: float = 0.8         # chance of opening the app on a given day
+    add: float = 3.0            # tasks added per active day (mean)
+    complete: float = 3.0       # tasks completed per active day (mean)
+    mandatory: float = 0.0      # daily mandatory tasks completed per active day (mean)
+    pause_above: int = 0        # pauses an inactive day when holding more tokens than this (0 = never)
+    difficulties: tuple = (1, 3, 3, 2, 1)   # relative odds of each Difficulty when adding
+    priorities: tuple = (1, 3, 3, 2, 1)     # relative odds of each Priority when adding
+
+    def logs_in(self, logic, rng):
+        return rng.random() < self.active
+
+    def act(self, logic, rng):
+        # enough daily mandatory tasks for the most this user ever completes in a day
+        while len(logic.mandatory_tasks) < math.ceil(self.mandatory):
+            logic.add_mandatory_task("Simulated routine", "daily")
+        today = logic.clock.today()
+        due = [task.id for task in logic.mandatory_tasks.due_on(today) if task.completed_on != today]
+        for task_id in due[:_draw(rng, self.mandatory)]:
+            logic.complete_mandatory_task(task_id)
+
+        for _ in range(_draw(rng, self.add)):
+            logic.add_task(
+                "Simulated task",
+                rng.choices(list(Difficulty), self.difficulties)[0],
+                rng.choices(list(Priority), self.priorities)[0]
+            )
+        # highest priority first, like someone working down the list
+        count = min(_draw(rng, self.complete), len(logic.tasks))
+        if count:
+            logic.complete_tasks(list(logic.tasks)[:count])
+
+    def skipped(self, logic, rng):
+        """Called on days the user doesn't log in (pausing happens from the CLI/cron)."""
+        if self.pause_above and logic.tokens > max(self.pause_above, PAUSE_COST):
+            logic.pause_day()
+
+
+def _draw(rng, mean):
+    """Whole number with the given mean (the fraction is rounded up that often)."""
+    whole = int(mean)
+    return whole + (rng.random() < mean - whole)
+
+
+@dataclass(slots=True)
+class DaySample:
+    day: date
+    level: int
+    xp: int
+    tokens: int
+    streak_days: int
+    open_tasks: int
+    urgent_tasks: int
+
+
+def simulate(days, behavior=None, start=date(2025, 1, 6), seed=0):
+    """Runs `days` simulated days; returns (logic, list of DaySample, one per day)."""
+    behavior = behavior or UserModel()
+    rng = random.Random(seed)
+    clock = SimulatedClock(start)
+    logic = ToDoLogic(MemoryStorage(), clock)
+
+    timeline = []
+    for _ in range(days):
+        if behavior.logs_in(logic, rng):
+            # same order as the window's startup checks
+            logic.check_weekly_updates()
+            logic.get_and_clear_pending_message()
+            logic.check_daily_status()
+            logic.check_deadlines()
+            behavior.act(logic, rng)
+        else:
+            behavior.skipped(logic, rng)
+
+        timeline.append(DaySample(
+            clock.today(), logic.level, logic.xp, logic.tokens, logic.streak_days,
+            len(logic.tasks), logic.count_tasks(Priority.URGENT)
+        ))
+        clock.advance(days=1)
+    return logic, timeline
+
+
+def summarize(logic, timeline):
+    totals = logic.stats.window()
+    streak, _ = logic.history.longest_streak(TASKS_FOR_STREAK)
+    years = len(timeline) / 365
+    return "\n".join([
+        f"Simulated {len(timeline)} days ({years:.1f} years), {timeline[0].day} to {timeline[-1].day}",
+        f"Final level {logic.level} ({logic.xp}/{logic.xp_to_next_level} XP), {logic.tokens} Tokens",
+        f"Completed {totals['completed']} of {totals['added']} tasks, {totals['mandatory']} mandatory",
+        f"Earned {totals['xp']} XP and {totals['tokens']} Tokens, spent {totals['spent']} Tokens",
+        f"Lost {totals['xp_lost_inactivity']} XP to inactivity and {totals['xp_lost_urgent']} XP to urgent tasks",
+        f"Longest streak {streak} days, {len(logic.stats.streaks)} streaks broken",
+        f"Open tasks at the end: {timeline[-1].open_tasks} ({timeline[-1].urgent_tasks} urgent)",
+        "Level at the end of each year: " + ", ".join(
+            str(sample.level) for sample in timeline[364::365]
+        ),
+    ])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate years of Codex use in memory.")
+    parser.add_argument("--days", type=int, default=3650)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start", type=date.fromisoformat, default=date(2025, 1, 6))
+    parser.add_argument("--active", type=float, default=0.8, help="chance of logging in each day")
+    parser.add_argument("--add", type=float, default=3.0, help="tasks added per active day")
+    parser.add_argument("--complete", type=float, default=3.0, help="tasks completed per active day")
+    parser.add_argument("--mandatory", type=float, default=0.0, help="daily mandatory tasks completed per active day")
+    parser.add_argument("--pause-above", type=int, default=0, help="pause skipped days when holding more tokens")
+    args = parser.parse_args(argv)
+
+    behavior = UserModel(args.active, args.add, args.complete, args.mandatory, args.pause_above)
+    started = time.perf_counter()
+    logic, timeline = simulate(args.days, behavior, args.start, args.seed)
+    print(summarize(logic, timeline))
+    print(f"({time.perf_counter() - started:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
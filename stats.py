@@ -0,0 +1,96 @@
+"""
+Materialized statistics for the Statistics tab.
+
+Everything is a per-day amount of one of METRICS. Besides the sparse
+{day: {metric: amount}} table, RollingStats keeps the running sum of every
+metric over the last 7/30/365 days and over all time. Adding an amount
+updates those sums in place, and moving to a new day only subtracts the
+days that slide out of each window, so nothing is ever recomputed from
+the whole table (except once, on load).
+"""
+from datetime import date, timedelta
+
+from clock import SystemClock
+
+WINDOWS = (7, 30, 365)
+
+METRICS = (
+    "xp",                   # earned by completing tasks
+    "tokens",               # earned by completing tasks
+    "completed",            # regular tasks completed
+    "added",                # regular tasks added
+    "mandatory",            # mandatory tasks completed
+    "spent",                # tokens spent on rewards and paused days
+    "xp_lost_inactivity",   # daily inactivity penalty
+    "xp_lost_urgent",       # weekly urgent task penalty
+    "streak_ended",         # length of a streak that was broken that day
+)
+
+
+class RollingStats:
+    def __init__(self, days=None, clock=None):
+        self.clock = clock or SystemClock()
+        self.today = self.clock.today()
+        self.days = {}          # date -> {metric: amount}, only days where something happened
+        self.totals = dict.fromkeys(METRICS, 0)
+        self.windows = {window: dict.fromkeys(METRICS, 0) for window in WINDOWS}
+        self.streaks = []       # (ended on, length), oldest first
+        self.pending = {}       # amounts added since take_pending(), in to_dict() form
+
+        for day, amounts in sorted((date.fromisoformat(day), amounts) for day, amounts in (days or {}).items()):
+            self.apply(day, amounts)
+
+    def roll(self, today):
+        """Moves the windows forward to end on `today`."""
+        if today <= self.today:
+            return
+        elapsed = (today - self.today).days
+        for window, sums in self.windows.items():
+            # the days that were in the window ending on self.today but not in the new one
+            first_leaving = self.today - timedelta(days=window - 1)
+            for offset in range(min(elapsed, window)):
+                amounts = self.days.get(first_leaving + timedelta(days=offset))
+                if amounts:
+                    for metric, amount in amounts.items():
+                        sums[metric] -= amount
+        self.today = today
+
+    def apply(self, day, amounts):
+        """Adds amounts for `day` without marking them pending (used when loading)."""
+        self.roll(day)
+        stored = self.days.setdefault(day, {})
+        age = (self.today - day).days
+        for metric, amount in amounts.items():
+            stored[metric] = stored.get(metric, 0) + amount
+            self.totals[metric] += amount
+            for window, sums in self.windows.items():
+                if age < window:
+                    sums[metric] += amount
+        if amounts.get("streak_ended"):
+            self.streaks.append((day, amounts["streak_ended"]))
+
+    def add(self, day=None, **amounts):
+        """Adds amounts (metric=amount) to a day, today by default."""
+        day = day or self.clock.today()
+        amounts = {metric: amount for metric, amount in amounts.items() if amount}
+        if not amounts:
+            return
+        self.apply(day, amounts)
+        pending = self.pending.setdefault(day.isoformat(), {})
+        for metric, amount in amounts.items():
+            pending[metric] = pending.get(metric, 0) + amount
+
+    def take_pending(self):
+        """Returns and forgets what was added since the last call (journaled with each change)."""
+        pending, self.pending = self.pending, {}
+        return pending
+
+    def window(self, days=None):
+        """Sums over the last `days` days (one of WINDOWS), or over all time if None."""
+        if days is None:
+            return dict(self.totals)
+        self.roll(self.clock.today())
+        return dict(self.windows[days])
+
+    def to_dict(self):
+        return {day.isoformat(): dict(amounts) for day, amounts in self.days.items()}
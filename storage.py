@@ -0,0 +1,591 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from history import CompletionHistory, write_chunk
+from records import Priority, Task
+from task_store import PriorityTaskStore
+
+# the journal is folded into the snapshot once it has this many records
+JOURNAL_COMPACT_THRESHOLD = 1000
+
+# write-behind saving: a burst of changes is written once it has been quiet
+# for AUTOSAVE_DEBOUNCE seconds, and never later than AUTOSAVE_MAX_LATENCY
+AUTOSAVE_DEBOUNCE = 0.2
+AUTOSAVE_MAX_LATENCY = 2.0
+
+# snapshots with more records than this are written without indentation:
+# indented output goes through json's pure Python encoder, about 10x slower
+SNAPSHOT_INDENT_LIMIT = 10000
+
+
+def default_storage(write_behind=False):
+    """
+    Picks the backend from CODEX_DATA (a .db/.sqlite path means SQLite).
+    write_behind moves journal writes to a background thread (used by the GUI).
+    """
+    path = os.environ.get("CODEX_DATA", "data.json")
+    if path.endswith((".db", ".sqlite")):
+        return SqliteStorage(path)
+    if write_behind:
+        return WriteBehindStorage(path)
+    return JournalStorage(path)
+
+
+def _encode_snapshot(data, seq):
+    size = sum(len(data.get(name, ())) for name in ("tasks", "mandatory_tasks", "shop_items"))
+    indent = 4 if size <= SNAPSHOT_INDENT_LIMIT else None
+    return json.dumps(dict(data, journal_seq=seq), indent=indent)
+
+
+class Storage:
+    """
+    Interface between ToDoLogic and disk. Every change reaches the backend as a
+    record from ToDoLogic._record(): {"op": ..., <op fields>, "s": <scalar state>}.
+    """
+
+    # whether shop page queries can be answered without the in-memory list
+    queryable = False
+    # whether regular tasks live in the backend (see task_store()), so snapshots leave them out
+    keeps_tasks = False
+
+    def load(self):
+        """Returns (snapshot dict or None, list of records to replay on top of it)."""
+        raise NotImplementedError
+
+    def append(self, record):
+        raise NotImplementedError
+
+    def needs_compaction(self):
+        return False
+
+    def write_snapshot(self, data):
+        raise NotImplementedError
+
+    def flush(self):
+        """Blocks until everything handed to the backend is on disk."""
+
+    def history(self):
+        """The completion history that goes with this data (in memory unless overridden)."""
+        return CompletionHistory()
+
+    def task_store(self, tasks=()):
+        """Where ToDoLogic keeps the regular tasks (in memory unless overridden)."""
+        return PriorityTaskStore(tasks)
+
+    def close(self):
+        pass
+
+
+class MemoryStorage(Storage):
+    """Keeps nothing: loads the given snapshot/records once and drops every change."""
+
+    def __init__(self, data=None, records=()):
+        self.data = data
+        self.records = list(records)
+
+    def load(self):
+        return self.data, self.records
+
+    def append(self, record):
+        pass
+
+    def write_snapshot(self, data):
+        pass
+
+
+class JournalStorage(Storage):
+    """Snapshot file plus an append-only journal of changes made since it was written."""
+
+    def __init__(self, path="data.json", journal_path=None):
+        self.path = path
+        self.journal_path = journal_path or os.path.splitext(path)[0] + ".journal"
+        self.history_path = os.path.splitext(path)[0] + ".history"
+        self.seq = 0               # sequence number of the last record written
+        self.pending = 0           # records written since the last snapshot
+        self._journal = None
+
+    def history(self):
+        return CompletionHistory(self.history_path)
+
+    def _read(self):
+        """
+        Reads the snapshot and the journal records newer than it. Also returns
+        the journal's length up to the last complete record.
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = None
+
+        seq = data.get("journal_seq", 0) if data else 0
+        records = []
+        good = 0
+        try:
+            with open(self.journal_path, "rb") as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # torn write from a crash, everything after it is garbage
+                    good += len(line)
+                    # records already folded into the snapshot are skipped
+                    if record["n"] > seq:
+                        records.append(record)
+                        seq = record["n"]
+        except FileNotFoundError:
+            pass
+        return data, records, good
+
+    def load(self):
+        """Returns (snapshot dict or None, list of journal records newer than it)."""
+        data, records, good = self._read()
+        try:
+            if os.path.getsize(self.journal_path) > good:
+                # cut the torn tail off, or new records would be appended after it and never read back
+                with open(self.journal_path, "r+b") as f:
+                    f.truncate(good)
+        except FileNotFoundError:
+            pass
+        self.seq = records[-1]["n"] if records else (data.get("journal_seq", 0) if data else 0)
+        self.pending = len(records)
+        return data, records
+
+    def _encode(self, record):
+        self.seq += 1
+        record["n"] = self.seq
+        return json.dumps(record, separators=(",", ":")) + "\n"
+
+    def _write_lines(self, text, count):
+        if self._journal is None:
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal.write(text)
+        self._journal.flush()
+        self.pending += count
+
+    def _replace_snapshot(self, text):
+        """Atomically swaps in a serialized snapshot and empties the journal."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, self.path)
+
+        # the snapshot already covers every record, so a crash before this
+        # truncation only leaves records that load() will skip
+        if self._journal is not None:
+            self._journal.close()
+        self._journal = open(self.journal_path, "w", encoding="utf-8")
+        self.pending = 0
+
+    def append(self, record):
+        """Appends one record to the journal."""
+        self._write_lines(self._encode(record), 1)
+
+    def needs_compaction(self):
+        return self.pending >= JOURNAL_COMPACT_THRESHOLD
+
+    def write_snapshot(self, data):
+        """Writes a full snapshot and empties the journal."""
+        self._replace_snapshot(_encode_snapshot(data, self.seq))
+
+    def close(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+
+class WriteBehindStorage(JournalStorage):
+    """
+    Journal whose file I/O happens on a background thread. append() only
+    serializes the record and queues it; the worker writes each burst with a
+    single write, and folds the journal into the snapshot by itself, so the
+    caller (the Tk main loop) never waits on the disk. Completion history
+    chunks go through the same queue, so flush() and close() cover them too.
+    """
+
+    def __init__(self, path="data.json", journal_path=None,
+                 debounce=AUTOSAVE_DEBOUNCE, max_latency=AUTOSAVE_MAX_LATENCY):
+        super().__init__(path, journal_path)
+        self.debounce = debounce
+        self.max_latency = max_latency
+        self._queue = []            # ("lines", text, count), ("snapshot", text) or ("history", chunk) jobs
+        self._queued_since = None   # when the oldest queued job arrived
+        self._jobs = 0              # jobs queued so far, history chunks included
+        self._jobs_done = 0         # how many of them the worker has written
+        self._urgent = False
+        self._closing = False
+        self._cond = threading.Condition()
+        self._worker = threading.Thread(target=self._run, name="codex-autosave", daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    def history(self):
+        return CompletionHistory(self.history_path, self._queue_history)
+
+    def _queue_history(self, chunk):
+        with self._cond:
+            self._enqueue(("history", chunk))
+
+    def _enqueue(self, job):
+        # callers hold self._cond, so sequence numbers reach the queue in order
+        self._jobs += 1
+        if not self._queue:
+            self._queued_since = time.monotonic()
+        self._queue.append(job)
+        self._cond.notify_all()
+
+    def append(self, record):
+        # serialized right away: the record's items are live objects that later changes mutate
+        with self._cond:
+            self._enqueue(("lines", self._encode(record), 1))
+
+    def needs_compaction(self):
+        return False  # the worker compacts on its own
+
+    def write_snapshot(self, data):
+        with self._cond:
+            self._enqueue(("snapshot", _encode_snapshot(data, self.seq)))
+
+    def _next_batch(self):
+        """Waits for a burst of jobs to settle (or hit max_latency) and takes it."""
+        with self._cond:
+            while not self._queue and not self._closing:
+                self._cond.wait()
+
+            deadline = self._queued_since + self.max_latency if self._queue else 0
+            while self._queue and not (self._closing or self._urgent):
+                queued = len(self._queue)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(min(self.debounce, remaining))
+                if len(self._queue) == queued:
+                    break  # quiet for a whole debounce period
+
+            batch, self._queue = self._queue, []
+            return batch, self.seq, self._jobs
+
+    def _run(self):
+        while True:
+            batch, seq, jobs = self._next_batch()
+            if not batch and self._closing:
+                return
+
+            lines, count, history = [], 0, []
+            for job in batch:
+                if job[0] == "lines":
+                    lines.append(job[1])
+                    count += job[2]
+                elif job[0] == "history":
+                    if job[1] is None:
+                        # emptied: the chunks before it are dropped with the file
+                        history = [None]
+                    else:
+                        history.append(job[1])
+                else:
+                    # a snapshot replaces everything queued before it
+                    lines, count = [], 0
+                    self._replace_snapshot(job[1])
+            if lines:
+                self._write_lines("".join(lines), count)
+            if history:
+                self._write_history(history)
+            if self.pending >= JOURNAL_COMPACT_THRESHOLD:
+                self._fold(seq)
+
+            with self._cond:
+                self._jobs_done = jobs
+                self._cond.notify_all()
+
+    def _write_history(self, chunks):
+        if chunks[0] is None:
+            write_chunk(self.history_path, None)
+            chunks = chunks[1:]
+        if chunks:
+            write_chunk(self.history_path, b"".join(chunks))
+
+    def _fold(self, seq):
+        """Rebuilds the snapshot from disk by replaying the journal, off the main thread."""
+        from logic import ToDoLogic  # imported here, logic itself depends on this module
+
+        data, records, _ = self._read()
+        snapshot = ToDoLogic(MemoryStorage(data, records))._snapshot()
+        self._replace_snapshot(_encode_snapshot(snapshot, seq))
+
+    def flush(self):
+        # waits on the jobs, not self.seq: snapshots and history chunks don't advance seq but must be on disk too
+        with self._cond:
+            target = self._jobs
+            self._urgent = True
+            self._cond.notify_all()
+            while self._jobs_done < target and self._worker.is_alive():
+                self._cond.wait(0.1)
+            self._urgent = False
+
+    def close(self):
+        if not self._closing:
+            self.flush()
+            with self._cond:
+                self._closing = True
+                self._cond.notify_all()
+            self._worker.join()
+            atexit.unregister(self.close)  # or every closed storage would be kept alive until exit
+        super().close()
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (id INTEGER PRIMARY KEY CHECK (id = 0), data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS tasks (id INTEGER PRIMARY KEY, priority INTEGER NOT NULL, position INTEGER NOT NULL DEFAULT 0, due TEXT, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS mandatory_tasks (id INTEGER PRIMARY KEY, activation_day INTEGER NOT NULL, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS shop_items (id INTEGER PRIMARY KEY, price INTEGER NOT NULL, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS daily_stats (day TEXT NOT NULL, metric TEXT NOT NULL, amount INTEGER NOT NULL, PRIMARY KEY (day, metric));
+"""
+
+INDEXES = """
+DROP INDEX IF EXISTS tasks_priority;
+CREATE INDEX IF NOT EXISTS tasks_order ON tasks (priority, position);
+CREATE INDEX IF NOT EXISTS tasks_due ON tasks (due) WHERE due IS NOT NULL;
+CREATE INDEX IF NOT EXISTS mandatory_tasks_activation_day ON mandatory_tasks (activation_day);
+CREATE INDEX IF NOT EXISTS shop_items_price ON shop_items (price);
+"""
+
+
+class SqliteTaskStore:
+    """
+    Regular tasks read from and written to the tasks table, with the same
+    interface as PriorityTaskStore, so they are never all loaded: counts,
+    pages and the next deadline come from the indexes. Rows are written
+    inside the transaction that SqliteStorage.append() commits for the change.
+    Tasks handed out are copies; changing one doesn't change the row.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def _end_position(self, priority):
+        """Position behind the last task of a priority (positions order the tasks within one)."""
+        return self.db.execute(
+            "SELECT COALESCE(MAX(position), 0) + 1 FROM tasks WHERE priority = ?", (int(priority),)
+        ).fetchone()[0]
+
+    def _tasks(self, sql, params=()):
+        return [Task.from_dict(json.loads(data)) for (data,) in self.db.execute(sql, params)]
+
+    def add(self, task):
+        data = task.to_dict()
+        self.db.execute(
+            "INSERT OR REPLACE INTO tasks (id, priority, position, due, data) VALUES (?, ?, ?, ?, ?)",
+            (task.id, int(task.priority), self._end_position(task.priority), data["due"], json.dumps(data))
+        )
+
+    def pop(self, task_id, default=None):
+        task = self.get(task_id)
+        if task is None:
+            return default
+        self.db.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+        return task
+
+    def get(self, task_id, default=None):
+        tasks = self._tasks("SELECT data FROM tasks WHERE id = ?", (task_id,))
+        return tasks[0] if tasks else default
+
+    def count(self, priority):
+        return self.db.execute("SELECT COUNT(*) FROM tasks WHERE priority = ?", (int(priority),)).fetchone()[0]
+
+    def promote(self, task_id, priority):
+        """Moves a task to another priority, behind the tasks already there."""
+        self.db.execute(
+            "UPDATE tasks SET priority = ?, position = ?, data = json_set(data, '$.priority', ?) WHERE id = ?",
+            (int(priority), self._end_position(priority), priority.label, task_id)
+        )
+
+    def next_deadline(self):
+        """Earliest due date of the tasks that aren't Urgent yet, or None."""
+        due = self.db.execute(
+            "SELECT MIN(due) FROM tasks WHERE due IS NOT NULL AND priority < ?", (int(Priority.URGENT),)
+        ).fetchone()[0]
+        return datetime.fromisoformat(due) if due else None
+
+    def pop_overdue(self, now):
+        """Tasks not Urgent yet whose deadline is at or before now (ToDoLogic makes them Urgent)."""
+        # due is stored to the minute, so the ISO text compares like the datetimes
+        return self._tasks(
+            "SELECT data FROM tasks WHERE due IS NOT NULL AND due <= ? AND priority < ? ORDER BY due, id",
+            (now.isoformat(), int(Priority.URGENT))
+        )
+
+    def values(self):
+        """Tasks in priority order (highest first, then by when they got it), streamed from the table."""
+        for (data,) in self.db.execute("SELECT data FROM tasks ORDER BY priority DESC, position"):
+            yield Task.from_dict(json.loads(data))
+
+    def page(self, offset, limit):
+        return self._tasks(
+            "SELECT data FROM tasks ORDER BY priority DESC, position LIMIT ? OFFSET ?", (limit, offset)
+        )
+
+    def __iter__(self):
+        return (task_id for (task_id,) in self.db.execute("SELECT id FROM tasks ORDER BY priority DESC, position"))
+
+    def __contains__(self, task_id):
+        return self.db.execute("SELECT 1 FROM tasks WHERE id = ?", (task_id,)).fetchone() is not None
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def clear(self):
+        self.db.execute("DELETE FROM tasks")
+
+    def escalate(self):
+        """Moves Low/Medium/High tasks up one level, High ones behind the tasks already Urgent."""
+        self.db.execute(
+            "UPDATE tasks SET position = position + ? WHERE priority = ?",
+            (self._end_position(Priority.URGENT), int(Priority.HIGH))
+        )
+        # same Low -> Medium -> High -> Urgent step as PriorityTaskStore.escalate
+        self.db.execute(
+            "UPDATE tasks SET priority = priority + 1, "
+            "data = json_set(data, '$.priority', CASE priority "
+            "WHEN 1 THEN 'Medium' WHEN 2 THEN 'High' ELSE 'Urgent' END) "
+            "WHERE priority BETWEEN 1 AND 3"
+        )
+
+
+class SqliteStorage(Storage):
+    """
+    One row per task/reward, so a change touches one row instead of the whole file.
+    The full record is kept as JSON next to the indexed columns. Regular tasks
+    stay in the database (see SqliteTaskStore), so loading doesn't grow with
+    the backlog; mandatory tasks and shop items are few and loaded like the
+    rest of the state.
+    """
+
+    queryable = True
+    keeps_tasks = True
+
+    def __init__(self, path="data.db"):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA synchronous = NORMAL")
+        self.db.executescript(SCHEMA)
+        self._migrate()
+        self.db.executescript(INDEXES)
+
+    def _migrate(self):
+        """Adds the task columns that older databases don't have."""
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(tasks)")}
+        with self.db:
+            if "position" not in columns:
+                self.db.execute("ALTER TABLE tasks ADD COLUMN position INTEGER NOT NULL DEFAULT 0")
+                self.db.execute("UPDATE tasks SET position = id")
+            if "due" not in columns:
+                self.db.execute("ALTER TABLE tasks ADD COLUMN due TEXT")
+                self.db.execute("UPDATE tasks SET due = json_extract(data, '$.due')")
+
+    def history(self):
+        # kept in its own binary file, a row per completion would defeat the columnar layout
+        return CompletionHistory(os.path.splitext(self.path)[0] + ".history")
+
+    def task_store(self, tasks=()):
+        store = SqliteTaskStore(self.db)
+        for task in tasks:
+            store.add(task)
+        return store
+
+    @staticmethod
+    def _key_value(list_name, item):
+        """Value of the indexed column for a record of the given list."""
+        if list_name == "mandatory_tasks":
+            return item.get("activation_day", -1)   # only set for single-weekday rules
+        return item.get("price", 0)
+
+    _key_column = {"mandatory_tasks": "activation_day", "shop_items": "price"}
+
+    def _upsert(self, list_name, item):
+        self.db.execute(
+            f"INSERT OR REPLACE INTO {list_name} (id, {self._key_column[list_name]}, data) VALUES (?, ?, ?)",
+            (item["id"], self._key_value(list_name, item), json.dumps(item))
+        )
+
+    def load(self):
+        row = self.db.execute("SELECT data FROM state WHERE id = 0").fetchone()
+        if row is None:
+            return None, []
+
+        data = json.loads(row[0])
+        for list_name in self._key_column:
+            rows = self.db.execute(f"SELECT data FROM {list_name} ORDER BY id")
+            data[list_name] = [json.loads(item) for (item,) in rows]
+        data["stats"] = {}
+        for day, metric, amount in self.db.execute("SELECT day, metric, amount FROM daily_stats"):
+            data["stats"].setdefault(day, {})[metric] = amount
+        return data, []
+
+    def _add_stats(self, stats):
+        self.db.executemany(
+            "INSERT INTO daily_stats (day, metric, amount) VALUES (?, ?, ?) "
+            "ON CONFLICT (day, metric) DO UPDATE SET amount = amount + excluded.amount",
+            [(day, metric, amount) for day, amounts in stats.items() for metric, amount in amounts.items()]
+        )
+
+    def append(self, record):
+        op = record["op"]
+        with self.db:
+            # task rows were already written by SqliteTaskStore, this commits them
+            if record.get("list") in self._key_column:
+                if op in ("add", "set"):
+                    self._upsert(record["list"], record["item"])
+                elif op == "del":
+                    self.db.executemany(
+                        f"DELETE FROM {record['list']} WHERE id = ?",
+                        [(item_id,) for item_id in record.get("ids", [record.get("id")])]
+                    )
+            if "st" in record:
+                self._add_stats(record["st"])
+            self.db.execute(
+                "INSERT OR REPLACE INTO state (id, data) VALUES (0, ?)", (json.dumps(record["s"]),)
+            )
+
+    def write_snapshot(self, data):
+        """Replaces everything; the tasks table only if the snapshot has tasks (ToDoLogic's leave them out)."""
+        state = {
+            key: value for key, value in data.items()
+            if key not in self._key_column and key not in ("stats", "tasks")
+        }
+        with self.db:
+            for list_name in self._key_column:
+                self.db.execute(f"DELETE FROM {list_name}")
+                for item in data[list_name]:
+                    self._upsert(list_name, item)
+            if "tasks" in data:
+                store = SqliteTaskStore(self.db)
+                store.clear()
+                for item in data["tasks"]:
+                    store.add(Task.from_dict(item))
+            self.db.execute("DELETE FROM daily_stats")
+            self._add_stats(data.get("stats", {}))
+            self.db.execute("INSERT OR REPLACE INTO state (id, data) VALUES (0, ?)", (json.dumps(state),))
+
+    # --- queries (served from the indexes) ---
+    def shop_items_page(self, offset, limit, max_price=None):
+        if max_price is None:
+            rows = self.db.execute(
+                "SELECT data FROM shop_items ORDER BY price, id LIMIT ? OFFSET ?", (limit, offset)
+            )
+        else:
+            rows = self.db.execute(
+                "SELECT data FROM shop_items WHERE price <= ? ORDER BY price, id LIMIT ? OFFSET ?",
+                (max_price, limit, offset)
+            )
+        return [json.loads(data) for (data,) in rows]
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,243 @@
+from datetime import timedelta
+from heapq import heappop, heappush
+from itertools import chain, islice
+
+from records import Priority
+
+
+class _Level(dict):
+    """Tasks of one escalating bucket; opened is the escalation count when it was the Low one."""
+    __slots__ = ("opened",)
+
+    def __init__(self, opened):
+        super().__init__()
+        self.opened = opened
+
+
+class PriorityTaskStore:
+    """
+    Regular tasks kept in insertion-ordered buckets by priority.
+    Adding, removing and looking up a task by id are O(1) and iterating
+    walks the buckets in priority order, so nothing ever needs sorting.
+    Tasks with a due date are also in a min-heap of (due, id), so the next
+    deadline and the ones that just passed are found without a scan.
+
+    A bucket doesn't store its priority, it is worked out from how many
+    escalations happened since the bucket was opened, so escalating only
+    moves the bucket heads. Tasks get their priority written back when
+    they are handed out.
+    """
+
+    def __init__(self, tasks=()):
+        self.escalations = 0
+        self.irrelevant = {}
+        self.levels = [_Level(0), _Level(-1), _Level(-2)]  # Low, Medium, High
+        self.urgent = [_Level(-3)]  # oldest first, every escalation adds the old High bucket
+        self.by_id = {}
+        self.bucket_of = {}
+        self.deadlines = []     # (due, id); entries of removed tasks are skipped lazily
+        for task in tasks:
+            self.add(task)
+
+    def _priority(self, bucket):
+        if bucket is self.irrelevant:
+            return Priority.IRRELEVANT
+        return Priority(min(Priority.URGENT, Priority.LOW + self.escalations - bucket.opened))
+
+    def _bucket(self, priority):
+        """The bucket new tasks of that priority go to, behind the ones already there."""
+        if priority == Priority.IRRELEVANT:
+            return self.irrelevant
+        if priority == Priority.URGENT:
+            return self.urgent[-1]
+        return self.levels[priority - Priority.LOW]
+
+    def _current(self, task):
+        task.priority = self._priority(self.bucket_of[task.id])
+        return task
+
+    def add(self, task):
+        bucket = self._bucket(task.priority)
+        bucket[task.id] = task
+        self.by_id[task.id] = task
+        self.bucket_of[task.id] = bucket
+        if task.due is not None:
+            heappush(self.deadlines, (task.due, task.id))
+
+    def pop(self, task_id, default=None):
+        task = self.by_id.pop(task_id, None)
+        if task is None:
+            return default
+        bucket = self.bucket_of.pop(task_id)
+        del bucket[task_id]
+        task.priority = self._priority(bucket)
+        return task
+
+    def get(self, task_id, default=None):
+        task = self.by_id.get(task_id)
+        return default if task is None else self._current(task)
+
+    def count(self, priority):
+        if priority == Priority.URGENT:
+            return sum(map(len, self.urgent))
+        return len(self._bucket(priority))
+
+    def promote(self, task_id, priority):
+        """Moves a task to another priority, behind the tasks already there."""
+        task = self.by_id[task_id]
+        del self.bucket_of[task_id][task_id]
+        task.priority = priority
+        bucket = self.bucket_of[task_id] = self._bucket(priority)
+        bucket[task_id] = task
+
+    def _drop_stale_deadlines(self):
+        deadlines = self.deadlines
+        while deadlines and deadlines[0][1] not in self.by_id:
+            heappop(deadlines)
+
+    def next_deadline(self):
+        """Earliest due date of the remaining tasks, or None."""
+        self._drop_stale_deadlines()
+        return self.deadlines[0][0] if self.deadlines else None
+
+    def pop_overdue(self, now):
+        """Removes and returns the tasks whose deadline is at or before now from the deadline heap."""
+        overdue = []
+        self._drop_stale_deadlines()
+        while self.deadlines and self.deadlines[0][0] <= now:
+            overdue.append(self._current(self.by_id[heappop(self.deadlines)[1]]))
+            self._drop_stale_deadlines()
+        return overdue
+
+    def values(self):
+        """Tasks in priority order (highest first, then by insertion)."""
+        for bucket in chain(self.urgent, reversed(self.levels), (self.irrelevant,)):
+            priority = self._priority(bucket)
+            for task in bucket.values():
+                task.priority = priority
+                yield task
+
+    def page(self, offset, limit):
+        return list(islice(self.values(), offset, offset + limit))
+
+    def __iter__(self):
+        return (task.id for task in self.values())
+
+    def __contains__(self, task_id):
+        return task_id in self.by_id
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def clear(self):
+        self.__init__()
+
+    def escalate(self):
+        """Moves Low/Medium/High tasks up one level by rotating their buckets."""
+        self.escalations += 1
+        # escalated tasks queue up behind the ones that already had the level
+        self.urgent = [bucket for bucket in self.urgent if bucket]
+        self.urgent.append(self.levels.pop())
+        self.levels.insert(0, _Level(self.escalations))
+
+
+class MandatoryTaskStore:
+    """
+    Mandatory tasks in insertion order, plus a min-heap of (next due day, id)
+    so moving to a new day only pops the tasks that are actually due instead
+    of evaluating every rule. Tasks due on the current day are in `due_today`.
+    """
+
+    def __init__(self, tasks=(), *, today):
+        self.by_id = {}
+        self.today = today
+        self.due_today = {}
+        self.heap = []          # (day, id); entries of removed or rescheduled tasks are skipped lazily
+        self.next_due = {}      # id -> day of the task's live heap entry
+        for task in tasks:
+            self.add(task)
+
+    def _schedule(self, task, after):
+        """Queues the task's first due day after the given day."""
+        day = task.rule.next_on_or_after(after + timedelta(days=1))
+        self.next_due[task.id] = day
+        heappush(self.heap, (day, task.id))
+
+    def add(self, task):
+        """Adds a task, or replaces the one with the same id."""
+        old = self.by_id.get(task.id)
+        if old is not None and old.rule == task.rule:
+            self.by_id[task.id] = task
+            if task.id in self.due_today:
+                self.due_today[task.id] = task
+            return
+
+        # asked before anything changes, so a task whose rule isn't one leaves the store as it was
+        due_today = task.rule.occurs_on(self.today)
+        next_day = task.rule.next_on_or_after(self.today + timedelta(days=1))
+        self.by_id[task.id] = task
+        self.due_today.pop(task.id, None)
+        if due_today:
+            self.due_today[task.id] = task
+        self.next_due[task.id] = next_day
+        heappush(self.heap, (next_day, task.id))
+
+    def pop(self, task_id, default=None):
+        task = self.by_id.pop(task_id, None)
+        if task is None:
+            return default
+        self.due_today.pop(task_id, None)
+        del self.next_due[task_id]
+        return task
+
+    def get(self, task_id, default=None):
+        return self.by_id.get(task_id, default)
+
+    def advance(self, today):
+        """Moves on to a later day and returns how many due days went by without a completion."""
+        if today <= self.today:
+            return 0
+
+        missed = sum(1 for task in self.due_today.values() if task.completed_on != self.today)
+        self.due_today = {}
+        yesterday = today - timedelta(days=1)
+
+        heap = self.heap
+        while heap and heap[0][0] <= today:
+            day, task_id = heappop(heap)
+            if self.next_due.get(task_id) != day:
+                continue
+            task = self.by_id[task_id]
+            # every due day from this one up to yesterday was skipped, counted in one go
+            missed += task.rule.count_between(day, yesterday)
+            if task.completed_on is not None and day <= task.completed_on <= yesterday:
+                missed -= 1
+            if task.rule.occurs_on(today):
+                self.due_today[task_id] = task
+            self._schedule(task, today)
+
+        self.today = today
+        return missed
+
+    def is_due(self, task, day):
+        if day == self.today:
+            return task.id in self.due_today
+        return task.rule.occurs_on(day)
+
+    def due_on(self, day):
+        """Tasks due on the given day (a lookup for the current day, a scan for any other)."""
+        if day == self.today:
+            return list(self.due_today.values())
+        return [task for task in self.by_id.values() if task.rule.occurs_on(day)]
+
+    def values(self):
+        return self.by_id.values()
+
+    def __iter__(self):
+        return (task.id for task in self.values())
+
+    def __contains__(self, task_id):
+        return task_id in self.by_id
+
+    def __len__(self):
+        return len(self.by_id)
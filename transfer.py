@@ -0,0 +1,210 @@
+"""
+Bulk import and export of tasks, mandatory tasks and shop items, as CSV or
+JSONL (one JSON object per line), e.g. to migrate a backlog from another tool:
+
+    python main.py import tasks backlog.csv
+    python main.py export shop_items rewards.jsonl
+
+Both directions stream row by row, so memory doesn't grow with the file
+beyond the imported records themselves. Rows are validated as they stream
+by and bad ones are reported with their line number (or, with strict, the
+file is checked completely before anything is imported). The records go in
+through ToDoLogic.add_many(): one sort at the end and one snapshot write
+instead of a sort and a journal record per row.
+
+Columns (JSONL uses the same keys):
+
+    tasks              name, difficulty, priority, due
+    mandatory_tasks    name, rule, completed_on
+    shop_items         name, price
+
+difficulty/priority are labels ("Very Hard", "Urgent"), due is YYYY-MM-DD
+[HH:MM], rule is the short text form ("mon,wed,fri", "every 3 days", see
+recurrence.py) or the JSON a data file keeps. Exports also have an id column;
+imported records always get new ids.
+"""
+import csv
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import date
+
+import recurrence
+from records import Difficulty, MandatoryTask, Priority, ShopItem, Task, parse_due
+
+COLUMNS = {
+    "tasks": ("id", "name", "difficulty", "priority", "due"),
+    "mandatory_tasks": ("id", "name", "rule", "completed_on"),
+    "shop_items": ("id", "name", "price"),
+}
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+# how many bad rows are described in the result, the rest are only counted
+MAX_ERRORS = 20
+
+
+def file_format(path):
+    fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Unknown file type: {path} (use .csv or .jsonl)")
+    return fmt
+
+
+# --- parsing: one row (dict of strings or JSON values) -> a complete, valid record, or ValueError ---
+
+def _name(row):
+    name = row.get("name")
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("Task name cannot be empty.")
+    return name.strip()
+
+
+def _whole(value, message):
+    """A JSON int or the digits of a CSV cell; bools and floats are not silently truncated."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    raise ValueError(message)
+
+
+def parse_task(row, today):
+    return Task(
+        0, _name(row),
+        Difficulty.coerce(row.get("difficulty") or "Easy"),
+        Priority.coerce(row.get("priority") or "Low"),
+        parse_due(row.get("due"))
+    )
+
+
+def parse_mandatory_task(row, today):
+    rule = row.get("rule")
+    if isinstance(rule, str) and rule.lstrip().startswith("{"):
+        rule = json.loads(rule)
+    if isinstance(rule, dict):
+        rule = recurrence.from_dict(rule)
+    elif rule in (None, "") and row.get("activation_day") not in (None, ""):
+        day = _whole(row["activation_day"], f"Invalid activation day {row['activation_day']!r}.")
+        rule = recurrence.coerce(day, today)   # older exports
+    else:
+        rule = recurrence.coerce(rule or "", today)
+    completed_on = row.get("completed_on")
+    if completed_on and not isinstance(completed_on, str):
+        raise ValueError(f"Invalid completion date {completed_on!r}, use YYYY-MM-DD.")
+    completed_on = date.fromisoformat(completed_on) if completed_on else None
+    return MandatoryTask(0, _name(row), rule, completed_on)
+
+
+def parse_shop_item(row, today):
+    name = row.get("name")
+    message = "A reward needs a name and a positive whole price."
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError(message)
+    price = _whole(row.get("price"), message)
+    if price <= 0:
+        raise ValueError(message)
+    return ShopItem(0, name.strip(), price)
+
+
+PARSERS = {"tasks": parse_task, "mandatory_tasks": parse_mandatory_task, "shop_items": parse_shop_item}
+
+
+# --- reading and writing ---
+
+def read_rows(f, fmt):
+    """Yields (line number, row dict) from an open text file."""
+    if fmt == "csv":
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(f, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        # anything but an object is reported like any other bad row
+        yield line_number, row if isinstance(row, dict) else {"__invalid__": line.strip()[:50]}
+
+
+def export_rows(logic, kind):
+    """Yields each record of one kind as a row dict, in display order."""
+    records = {"tasks": logic.tasks, "mandatory_tasks": logic.mandatory_tasks, "shop_items": logic.shop_items}[kind]
+    for record in records.values():
+        yield record.to_dict()
+
+
+def write_rows(f, fmt, kind, rows):
+    """Writes row dicts to an open text file; returns how many."""
+    count = 0
+    if fmt == "csv":
+        writer = csv.DictWriter(f, COLUMNS[kind], extrasaction="ignore")
+        writer.writeheader()
+        for row in rows:
+            if kind == "mandatory_tasks":
+                row["rule"] = json.dumps(row["rule"], separators=(",", ":"))
+            writer.writerow(row)
+            count += 1
+    else:
+        for row in rows:
+            f.write(json.dumps(row, separators=(",", ":")) + "\n")
+            count += 1
+    return count
+
+
+@dataclass
+class ImportResult:
+    imported: int = 0
+    rejected: int = 0
+    errors: list = field(default_factory=list)     # (line number, message), the first MAX_ERRORS
+
+    def describe(self, kind):
+        lines = [f"Imported {self.imported} {kind.replace('_', ' ')}, rejected {self.rejected} row(s)."]
+        lines += [f"  line {line}: {message}" for line, message in self.errors]
+        if self.rejected > len(self.errors):
+            lines.append(f"  ... and {self.rejected - len(self.errors)} more")
+        return "\n".join(lines)
+
+
+def _valid_records(kind, rows, today, result):
+    """Yields the records that parse, counting and describing the rows that don't."""
+    parse = PARSERS[kind]
+    for line, row in rows:
+        try:
+            if "__invalid__" in row:
+                raise ValueError(f"Not a JSON object: {row['__invalid__']!r}")
+            yield parse(row, today)
+        except (ValueError, TypeError, KeyError) as e:
+            result.rejected += 1
+            if len(result.errors) < MAX_ERRORS:
+                result.errors.append((line, str(e) or type(e).__name__))
+
+
+def import_rows(logic, kind, rows):
+    """Imports (line number, row) pairs, skipping bad rows; returns an ImportResult."""
+    result = ImportResult()
+    result.imported = logic.add_many(kind, _valid_records(kind, rows, logic.clock.today(), result))
+    return result
+
+
+def import_file(logic, kind, path, strict=False):
+    """Imports a .csv/.jsonl file. strict reads it twice: nothing is imported if any row is bad."""
+    fmt = file_format(path)
+    if strict:
+        result = ImportResult()
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            for _ in _valid_records(kind, read_rows(f, fmt), logic.clock.today(), result):
+                pass
+        if result.rejected:
+            return result
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return import_rows(logic, kind, read_rows(f, fmt))
+
+
+def export_file(logic, kind, path):
+    """Writes every record of one kind to a .csv/.jsonl file; returns how many."""
+    fmt = file_format(path)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        return write_rows(f, fmt, kind, export_rows(logic, kind))
@@ -0,0 +1,331 @@
+"""
+Monte Carlo tuner for the balance constants in logic.py.
+
+Simulates thousands of synthetic users at once, one row per user in NumPy
+arrays, following the same daily/weekly rules as ToDoLogic (see simulate.py
+for the exact, one-user-at-a-time version). Each point of a parameter grid
+gets a report on level curves, the token economy and streak lengths, and
+grid points can be spread over a process pool.
+
+    python tune.py --users 5000 --days 730 --grid XP_LOSS_PER_DAY=10,20,40 TASKS_FOR_STREAK=2,3 --workers 4
+
+The behavior model is simulate.UserModel. Tasks are completed highest
+priority first and rewards use the reward table's priority multipliers
+averaged over the day's completions, which is close to but not exactly what
+ToDoLogic pays per task. `--check RUNS` compares the current constants
+against RUNS runs of simulate.simulate(), the real ToDoLogic:
+
+    python tune.py --check 20 --days 365 --active 1.0
+"""
+import argparse
+import itertools
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+
+import numpy as np
+
+import logic
+import simulate
+from simulate import UserModel
+
+# the tunable constants and their current values in logic.py
+DEFAULTS = {
+    "XP_LOSS_PER_DAY": logic.XP_LOSS_PER_DAY,
+    "PAUSE_COST": logic.PAUSE_COST,
+    "TASKS_FOR_STREAK": logic.TASKS_FOR_STREAK,
+    "STREAK_MULTIPLIER_INCREASE": logic.STREAK_MULTIPLIER_INCREASE,
+    "XP_PENALTY_PER_URGENT_TASK": logic.XP_PENALTY_PER_URGENT_TASK,
+    "MANDATORY_TASKS_TO_SKIP_DAY": logic.MANDATORY_TASKS_TO_SKIP_DAY,
+    "LEVEL_GROWTH": logic.LEVEL_GROWTH,
+}
+
+URGENT, HIGH, MEDIUM, LOW = 4, 3, 2, 1
+
+
+def level_starts(growth, first=100, top=1e18):
+    """cumulative[i] = XP needed to reach level i + 1 from level 1 (same rounding as LevelCurve)."""
+    thresholds = [first]
+    while sum(thresholds) < top:
+        thresholds.append(int(thresholds[-1] * growth))
+    return np.concatenate(([0], np.cumsum(thresholds, dtype=np.float64)))
+
+
+def _draw(rng, mean, users):
+    """Whole numbers with the given mean, one per user (see simulate._draw)."""
+    whole = int(mean)
+    return whole + (rng.random(users) < mean - whole)
+
+
+def simulate_users(params=None, behavior=None, users=1000, days=365, seed=0, sample_every=30):
+    """Runs every user through `days` days under `params`; returns the report dict."""
+    p = {**DEFAULTS, **(params or {})}
+    behavior = behavior or UserModel()
+    rng = np.random.default_rng(seed)
+    cumulative = level_starts(p["LEVEL_GROWTH"])
+
+    difficulty_odds = np.array(behavior.difficulties, dtype=float) / sum(behavior.difficulties)
+    priority_odds = np.array(behavior.priorities, dtype=float) / sum(behavior.priorities)
+    base_tokens = 10 * np.array(logic.DIFFICULTY_WEIGHT, dtype=float)
+    priority_multiplier = np.array(logic.PRIORITY_MULTIPLIER)
+    streak_goal = p["TASKS_FOR_STREAK"]
+
+    level = np.ones(users, dtype=np.int64)
+    xp = np.zeros(users)
+    tokens = np.zeros(users)
+    streak = np.zeros(users, dtype=np.int64)
+    last_streak_day = np.full(users, -1)
+    open_tasks = np.zeros((users, 5), dtype=np.int64)      # per priority
+    # the day fields of ToDoLogic, as day numbers (day 0 is the Monday the profile starts)
+    last_login = np.zeros(users, dtype=np.int64)
+    last_weekly_check = np.zeros(users, dtype=np.int64)
+    paused_until = np.full(users, -7)
+    done_today = np.zeros(users, dtype=np.int64)           # tasks_completed_today
+
+    broken_streaks = []
+    level_samples = []
+    earned_per_day = np.zeros(days)
+    lost_inactivity = np.zeros(users)
+    lost_urgent = np.zeros(users)
+    spent = np.zeros(users)
+
+    for day in range(days):
+        active = rng.random(users) < behavior.active
+
+        # users who stay away may pause the day (from the CLI/cron, see UserModel.skipped)
+        if behavior.pause_above:
+            pausing = ~active & (tokens > max(behavior.pause_above, p["PAUSE_COST"]))
+            tokens -= np.where(pausing, p["PAUSE_COST"], 0)
+            spent += np.where(pausing, p["PAUSE_COST"], 0)
+            paused_until = np.where(pausing, day, paused_until)
+
+        # check_weekly_updates, on the first login of a week (weeks start on Sunday):
+        # urgent penalty, then every bucket moves up one priority, once however many weeks went by
+        weekly = active & ((day + 1) // 7 > (last_weekly_check + 1) // 7)
+        if weekly.any():
+            loss = np.where(weekly, np.minimum(xp, open_tasks[:, URGENT] * p["XP_PENALTY_PER_URGENT_TASK"]), 0)
+            xp -= loss
+            lost_urgent += loss
+            rows = open_tasks[weekly]
+            rows[:, URGENT] += rows[:, HIGH]
+            rows[:, HIGH:URGENT] = rows[:, MEDIUM:HIGH]
+            rows[:, MEDIUM:HIGH] = rows[:, LOW:MEDIUM]
+            rows[:, LOW] = 0
+            open_tasks[weekly] = rows
+            last_weekly_check = np.where(weekly, day, last_weekly_check)
+
+        # check_daily_status, on the first login after last_login_date
+        new_day = active & (day > last_login)
+
+        # the streak breaks unless yesterday reached the goal or was paused
+        broken = new_day & (last_streak_day < day - 1) & (paused_until != day - 1) & (streak > 0)
+        broken_streaks.append(streak[broken])
+        streak[broken] = 0
+
+        # every Monday-Saturday after the last login up to and including today costs XP,
+        # except the paused day
+        first = last_login + 1
+        penalized = (day - first + 1) - ((day + 1) // 7 - first // 7)
+        penalized -= (paused_until >= first) & (paused_until <= day) & (paused_until % 7 != 6)
+        loss = np.where(new_day, np.minimum(xp, np.maximum(penalized, 0) * p["XP_LOSS_PER_DAY"]), 0)
+        xp -= loss
+        lost_inactivity += loss
+        done_today = np.where(new_day, 0, done_today)
+        last_login = np.where(active, day, last_login)
+
+        # mandatory tasks: enough of them skip tomorrow (last_login_date moves to it)
+        mandatory = np.where(active, _draw(rng, behavior.mandatory, users), 0)
+        last_login = np.where(mandatory >= p["MANDATORY_TASKS_TO_SKIP_DAY"], day + 1, last_login)
+
+        # add tasks, then complete them highest priority first
+        added = np.where(active, _draw(rng, behavior.add, users), 0)
+        open_tasks += rng.multinomial(added, priority_odds)
+        remaining = np.minimum(np.where(active, _draw(rng, behavior.complete, users), 0), open_tasks.sum(axis=1))
+        completed = remaining.copy()
+        multiplier_sum = np.zeros(users)
+        for priority in range(URGENT, -1, -1):
+            taken = np.minimum(open_tasks[:, priority], remaining)
+            open_tasks[:, priority] -= taken
+            remaining -= taken
+            multiplier_sum += taken * priority_multiplier[priority]
+
+        # streak: the completion that reaches the goal and the ones before it pay the old multiplier
+        old_multiplier = 1 + streak * p["STREAK_MULTIPLIER_INCREASE"]
+        at_old_count = np.minimum(completed, np.maximum(0, streak_goal - done_today - 1) + 1)
+        done_today += completed
+        reached = (completed > 0) & (done_today >= streak_goal)
+        streak = np.where(
+            reached & (last_streak_day == day - 1), streak + 1,
+            np.where(reached & (last_streak_day != day), 1, streak)
+        )
+        last_streak_day = np.where(reached, day, last_streak_day)
+        new_multiplier = 1 + streak * p["STREAK_MULTIPLIER_INCREASE"]
+
+        difficulty_counts = rng.multinomial(completed, difficulty_odds)
+        safe_completed = np.maximum(completed, 1)
+        base = (difficulty_counts @ base_tokens) * multiplier_sum / safe_completed
+        at_old = at_old_count / safe_completed
+        gained_tokens = np.floor(base * (at_old * old_multiplier + (1 - at_old) * new_multiplier))
+        tokens += gained_tokens
+        earned_per_day[day] = gained_tokens.mean()
+
+        # XP is 1.5x the tokens in the reward table; levels come from the cumulative curve
+        total = cumulative[level - 1] + xp + 1.5 * gained_tokens
+        level = np.searchsorted(cumulative, total, side="right")
+        xp = total - cumulative[level - 1]
+
+        if (day + 1) % sample_every == 0:
+            level_samples.append(float(level.mean()))
+
+    broken_streaks = np.concatenate(broken_streaks + [streak])
+    month = min(30, days)
+    years = days / 365
+    return {
+        "params": p,
+        "level_mean_by_sample": level_samples,
+        "level_mean": float(level.mean()),
+        "level_p10_p50_p90": np.percentile(level, [10, 50, 90]).tolist(),
+        "tokens_per_day_first_month": float(earned_per_day[:month].mean()),
+        "tokens_per_day_last_month": float(earned_per_day[-month:].mean()),
+        "token_inflation": float(earned_per_day[-month:].mean() / max(earned_per_day[:month].mean(), 1e-9)),
+        "tokens_p50": float(np.median(tokens)),
+        "pause_cost_in_days": float(p["PAUSE_COST"] / max(earned_per_day[-month:].mean(), 1e-9)),
+        "streak_mean": float(broken_streaks.mean()) if broken_streaks.size else 0.0,
+        "streak_p50_p90_max": (
+            np.percentile(broken_streaks, [50, 90]).tolist() + [int(broken_streaks.max())]
+            if broken_streaks.size else [0, 0, 0]
+        ),
+        "tokens_earned_per_year": float(earned_per_day.sum() / years),
+        "xp_lost_inactivity_per_year": float(lost_inactivity.mean() / years),
+        "xp_lost_urgent_per_year": float(lost_urgent.mean() / years),
+        "tokens_spent_per_year": float(spent.mean() / years),
+    }
+
+
+def _run_point(args):
+    params, behavior, users, days, seed = args
+    return simulate_users(params, UserModel(**behavior), users, days, seed)
+
+
+def run_grid(grid, behavior=None, users=1000, days=365, seed=0, workers=1):
+    """Runs every combination of grid ({name: [values]}); workers > 1 uses a process pool."""
+    behavior = asdict(behavior or UserModel())
+    names = list(grid)
+    points = [
+        (dict(zip(names, values)), behavior, users, days, seed)
+        for values in itertools.product(*(grid[name] for name in names))
+    ]
+    if workers > 1 and len(points) > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            return list(pool.map(_run_point, points))
+    return [_run_point(point) for point in points]
+
+
+# (report key, what it is) compared by cross_check()
+CHECKED = [
+    ("level_mean", "final level"),
+    ("tokens_earned_per_year", "Tokens earned per year"),
+    ("xp_lost_inactivity_per_year", "XP lost to inactivity per year"),
+    ("xp_lost_urgent_per_year", "XP lost to urgent tasks per year"),
+    ("tokens_spent_per_year", "Tokens spent on pauses per year"),
+]
+
+
+def cross_check(behavior=None, days=365, runs=20, users=2000, seed=0):
+    """
+    (what, simulate.simulate() mean over `runs` users, simulate_users() mean) for each
+    of CHECKED, both under the current constants in logic.py.
+    """
+    years = days / 365
+    exact = {key: 0.0 for key, _ in CHECKED}
+    for run in range(runs):
+        todo, _ = simulate.simulate(days, behavior, seed=seed + run)
+        totals = todo.stats.window()
+        exact["level_mean"] += todo.level
+        exact["tokens_earned_per_year"] += totals["tokens"] / years
+        exact["xp_lost_inactivity_per_year"] += totals["xp_lost_inactivity"] / years
+        exact["xp_lost_urgent_per_year"] += totals["xp_lost_urgent"] / years
+        exact["tokens_spent_per_year"] += totals["spent"] / years
+    report = simulate_users(None, behavior, users, days, seed)
+    return [(what, exact[key] / runs, report[key]) for key, what in CHECKED]
+
+
+def format_report(report, tuned):
+    lines = [", ".join(f"{name}={report['params'][name]}" for name in tuned) or "current constants"]
+    levels = report["level_mean_by_sample"]
+    lines.append(
+        f"  level p10/p50/p90 {'/'.join(f'{value:.0f}' for value in report['level_p10_p50_p90'])}"
+        f", mean curve {' '.join(f'{value:.1f}' for value in levels[::max(1, len(levels) // 8)])}"
+    )
+    lines.append(
+        f"  tokens/day {report['tokens_per_day_first_month']:.0f} -> {report['tokens_per_day_last_month']:.0f}"
+        f" (x{report['token_inflation']:.2f}), median balance {report['tokens_p50']:.0f},"
+        f" a pause costs {report['pause_cost_in_days']:.2f} days of earnings"
+    )
+    p50, p90, longest = report["streak_p50_p90_max"]
+    lines.append(f"  streaks mean {report['streak_mean']:.1f}, p50 {p50:.0f}, p90 {p90:.0f}, max {longest}")
+    lines.append(
+        f"  per year: {report['xp_lost_inactivity_per_year']:.0f} XP lost to inactivity,"
+        f" {report['xp_lost_urgent_per_year']:.0f} XP to urgent tasks,"
+        f" {report['tokens_spent_per_year']:.0f} Tokens on pauses"
+    )
+    return "\n".join(lines)
+
+
+def parse_grid(items):
+    """NAME=v1,v2 ... -> {NAME: [values]}, values typed like the current constant."""
+    grid = {}
+    for item in items:
+        name, _, values = item.partition("=")
+        if name not in DEFAULTS or not values:
+            raise argparse.ArgumentTypeError(f"expected NAME=v1,v2 with NAME one of {', '.join(DEFAULTS)}")
+        kind = type(DEFAULTS[name])
+        try:
+            grid[name] = [kind(value) for value in values.split(",")]
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"{name} values must be {kind.__name__}s, got {values!r}") from None
+        # int(threshold * growth) has to grow from the first threshold of 100, or levels never end
+        if name == "LEVEL_GROWTH" and any(int(100 * value) <= 100 for value in grid[name]):
+            raise argparse.ArgumentTypeError("LEVEL_GROWTH values must be at least 1.01")
+    return grid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo tuning of the balance constants.")
+    parser.add_argument("--grid", nargs="*", default=[], help="NAME=v1,v2 for each constant to vary")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--check", type=int, metavar="RUNS", help="compare with RUNS runs of simulate.py instead")
+    for field, default in asdict(UserModel()).items():
+        if not isinstance(default, tuple):
+            parser.add_argument(f"--{field.replace('_', '-')}", type=type(default), default=default)
+    args = parser.parse_args(argv)
+
+    try:
+        grid = parse_grid(args.grid)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    behavior = UserModel(**{
+        field: getattr(args, field) for field, default in asdict(UserModel()).items()
+        if not isinstance(default, tuple)
+    })
+
+    started = time.perf_counter()
+    if args.check:
+        print(f"{'':<34}{'simulate.py':>14}{'tune.py':>14}")
+        for what, exact, estimate in cross_check(behavior, args.days, args.check, args.users, args.seed):
+            print(f"{what:<34}{exact:>14.1f}{estimate:>14.1f}")
+        print(f"({args.check} runs of simulate.py, {args.users} users in {time.perf_counter() - started:.2f}s)")
+        return 0
+    reports = run_grid(grid, behavior, args.users, args.days, args.seed, args.workers)
+    for report in reports:
+        print(format_report(report, list(grid)))
+    print(f"({len(reports)} points x {args.users} users x {args.days} days in {time.perf_counter() - started:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())